@@ -1,40 +1,112 @@
 """AoC :: Day 1"""
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    import numpy as np
 
 input_path = Path(__file__).parent / 'Day01.in'
+# Inputs smaller than this many bytes are solved in pure Python, which is quicker than
+# importing numpy
+SMALL_INPUT = 1 << 20
+# Bytes read per chunk when streaming the input
+CHUNK_SIZE = 1 << 24
+# Drop the R and turn the L into a minus sign in a single pass over the bytes
+_SIGNS = bytes.maketrans(b"L", b"-")
+
+
+def _chunk_to_array(chunk: bytes) -> "np.ndarray":
+    """Convert a block of complete instruction lines into an int64 array"""
+    import numpy as np
+    return np.array(chunk.translate(_SIGNS, b"R").split()).astype(np.int64)
+
+
+def parse_chunks(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator["np.ndarray"]:
+    """Stream the plaintext input as int64 arrays, never splitting an instruction across chunks"""
+    tail = b""
+    with path.open("rb") as f:
+        while block := f.read(chunk_size):
+            block = tail + block
+            # Carry the unfinished last line over to the next chunk
+            cut = block.rfind(b"\n") + 1
+            block, tail = block[:cut], block[cut:]
+            if block.strip():
+                yield _chunk_to_array(block)
+    if tail.strip():
+        yield _chunk_to_array(tail)
+
+
+def parse(path: Path) -> "list[int] | np.ndarray":
+    """Parse the plaintext input, into a list if it is small and an int64 array if not"""
+    if path.stat().st_size < SMALL_INPUT:
+        instructions = path.read_text().replace("R", "").replace("L", "-").strip().splitlines()
+        return [int(instruction) for instruction in instructions]
+    import numpy as np
+    chunks = list(parse_chunks(path))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+
+
+def dial_counts(chunks: Iterable["np.ndarray"], start: int = 50, dial_max: int = 100) -> tuple[int, int]:
+    """
+    Count zero landings (part one) and zero crossings (part two) over a stream of instruction blocks
+
+    Each block is solved in closed form: the dial positions are the cumulative sum modulo
+    `dial_max` and the crossings are the floor division of each rotation's end point.
+    Only the final dial position is carried forward to the next block.
+    """
+    import numpy as np
+    landings = crossings = 0
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        positions = (start + np.cumsum(chunk)) % dial_max
+        # Position of the dial before each instruction
+        previous = np.empty_like(positions)
+        previous[0] = start
+        previous[1:] = positions[:-1]
 
-def parse(path: Path):
-    """Parse the plaintext input"""
-    instructions = path.read_text().replace("R", "").replace("L", "-").strip().splitlines()
-    return [int(instruction) for instruction in instructions]
+        landings += int(np.count_nonzero(positions == 0))
+        crossings += int(np.abs((previous + chunk) // dial_max).sum())
+        start = int(positions[-1])
+    return landings, crossings
 
 
-def part_one(data: list[int], start: int = 50, dial_max: int = 100):
+def part_one(data: "list[int] | np.ndarray", start: int = 50, dial_max: int = 100):
     """Solve part one of Day 1"""
-    ctr = 0
-    for instruction in data:
-        start = (start + instruction) % dial_max
-        ctr += (start == 0)
-    return ctr
+    if isinstance(data, list):
+        ctr = 0
+        for instruction in data:
+            start = (start + instruction) % dial_max
+            ctr += (start == 0)
+        return ctr
+    import numpy as np
+    return dial_counts([np.asarray(data, dtype=np.int64)], start, dial_max)[0]
 
 
-def part_two(data: list[int], start: int = 50, dial_max: int = 100):
+def part_two(data: "list[int] | np.ndarray", start: int = 50, dial_max: int = 100):
     """Solve part two of Day 1"""
-    ctr = 0
-    for instruction in data:
-        ctr += abs((start + instruction) // dial_max)
-        start = (start + instruction) % dial_max
-    return ctr
+    if isinstance(data, list):
+        ctr = 0
+        for instruction in data:
+            ctr += abs((start + instruction) // dial_max)
+            start = (start + instruction) % dial_max
+        return ctr
+    import numpy as np
+    return dial_counts([np.asarray(data, dtype=np.int64)], start, dial_max)[1]
 
 
 def main():
     """Run the solutions for Day 1 and print the results"""
-    # Parse inputs
-    data = parse(input_path)
+    if input_path.stat().st_size < SMALL_INPUT:
+        data = parse(input_path)
+        landings, crossings = part_one(data), part_two(data)
+    else:
+        # Stream the input once, counting both parts as it goes
+        landings, crossings = dial_counts(parse_chunks(input_path))
     # Part 1
-    print(f"Part 1: {part_one(data)}")
+    print(f"Part 1: {landings}")
     # Part 2
-    print(f"Part 2: {part_two(data)}")
+    print(f"Part 2: {crossings}")
 
 
 if __name__ == '__main__':
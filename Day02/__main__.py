@@ -1,6 +1,7 @@
 """AoC :: Day 2"""
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable
 
 
 input_path = Path(__file__).parent / 'Day02.in'
@@ -26,29 +27,80 @@ def parse(path: Path):
     return [Range.parse(r) for r in path.read_text().strip().split(",")]
 
 
+def merge(data: list[Range]) -> list[Range]:
+    """Merge overlapping ranges so that no ID is counted twice"""
+    merged: list[Range] = []
+    for r in sorted(data, key=lambda r: r.start):
+        if merged and r.start <= merged[-1].stop + 1:
+            merged[-1] = Range(merged[-1].start, max(merged[-1].stop, r.stop))
+        else:
+            merged.append(Range(r.start, r.stop))
+    return merged
+
+
+def divisors(n: int) -> list[int]:
+    """All positive divisors of n"""
+    return [k for k in range(1, n+1) if n % k == 0]
+
+
+def mobius(n: int) -> int:
+    """The Möbius function of n"""
+    sign, p = 1, 2
+    while p * p <= n:
+        if n % p == 0:
+            n //= p
+            if n % p == 0:
+                return 0
+            sign = -sign
+        p += 1
+    return -sign if n > 1 else sign
+
+
+def repeat_multiplier(block: int, repeats: int) -> int:
+    """Multiplier turning a `block` digit i into str(i)*repeats, e.g. (3, 3) -> 1001001"""
+    return (10**(block*repeats) - 1) // (10**block - 1)
+
+
+def repeated_count_sum(r: Range, length: int, block: int) -> tuple[int, int]:
+    """Count and sum the `length` digit numbers in r made of a `block` digit number repeated"""
+    multiplier = repeat_multiplier(block, length // block)
+    # i ranges over block digit numbers whose repetition lands inside r
+    lo = max(10**(block-1), -(-r.start // multiplier))
+    hi = min(10**block - 1, r.stop // multiplier)
+    if lo > hi:
+        return 0, 0
+    return hi - lo + 1, multiplier * (lo + hi) * (hi - lo + 1) // 2
+
+
+def repeated_id_sum(data: list[Range], repeats: Iterable[int]) -> int:
+    """
+    Sum the IDs in data that are a number repeated d times for some d in repeats
+
+    IDs of a given length matching several d are counted once using inclusion-exclusion
+    over their primitive (shortest) repeating block.
+    """
+    repeats = set(repeats)
+    total = 0
+    for r in merge(data):
+        for length in range(len(str(r.start)), len(str(r.stop))+1):
+            blocks = {length // d for d in repeats if 1 < d <= length and length % d == 0}
+            # An ID is counted if its primitive block length divides any allowed block length
+            periods = {p for block in blocks for p in divisors(block)}
+            for p in periods:
+                total += sum(mobius(p // q) * repeated_count_sum(r, length, q)[1] for q in divisors(p))
+    return total
+
+
 def part_one(data: list[Range], d: int = 2):
     """Solution to part one"""
-    # Max value in ranges
-    Ms = [str(r.stop) for r in data]
-    m = max(int(M[:len(M)//d]) for M in Ms)
-
-    s = {n for i in range(1, m+1) if (n := int(str(i)*d)) and any([r.valid(n) for r in data])}
-    return sum(s)
+    return repeated_id_sum(data, [d])
 
 
 def part_two(data: list[Range]):
     """Solution to part two"""
-    # init set of numbers
-    s = set()
-
-    # Max value in ranges
-    Ms = [str(r.stop) for r in data]
-
-    for d in range(2, max(len(M) for M in Ms)):
-        m = max(int(M[:len(M)//d]) for M in Ms if len(M)//d)
-        s |= {n for i in range(1, m+1) if (n := int(str(i)*d)) and any([r.valid(n) for r in data])}
-
-    return sum(s)
+    # Max number of digits in ranges
+    D = max(len(str(r.stop)) for r in data)
+    return repeated_id_sum(data, range(2, D+1))
     
 
 def main():
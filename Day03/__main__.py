@@ -2,8 +2,14 @@
 from pathlib import Path
 from typing import Sequence
 
+import numpy as np
+
+from aoc.grid import load_grid
+
 # Input path
 input_path = Path(__file__).parent / 'Day03.in'
+# Cells of banks whose next-occurrence tables are held in memory at once
+BLOCK_CELLS = 1 << 20
 
 
 def parse(path: Path):
@@ -11,34 +17,99 @@ def parse(path: Path):
     return [list(map(int, line)) for line in path.read_text().strip().splitlines()]
 
 
-def indexed_max(numbers: Sequence[int]) -> tuple[int, int]:
-    """Return the (index, value) pair of the left-most maximal element in a sequence"""
-    return max(enumerate(numbers), key=lambda x: x[1])
+def parse_array(path: Path) -> np.ndarray:
+    """Parse the plaintext input into a 2-D uint8 array with one bank per row"""
+    return load_grid(path) - ord("0")
 
 
-def solve(line: list[int], digits: int):
+def solve(line: Sequence[int], digits: int):
     """Solve the problem for a single line"""
-    def recursive_solve(line: list[int], digits: int, cum_str: str = ""):
-        """Use recursion to simplify logic"""
-        # Base case
-        if digits < 1:
-            return cum_str
-        # Else proceed with recursion
-        j, M = indexed_max(line[:len(line)-digits+1])
-        return recursive_solve(line[j+1:], digits-1, cum_str+str(M))
-    
-    return int(recursive_solve(line, digits))
+    # Monotonic stack: a digit knocks out smaller digits before it while we can still afford to drop them
+    drops = len(line) - digits
+    stack: list[int] = []
+    for battery in line:
+        while drops and stack and stack[-1] < battery:
+            stack.pop()
+            drops -= 1
+        stack.append(battery)
+
+    joltage = 0
+    for battery in stack[:digits]:
+        joltage = 10 * joltage + battery
+    return joltage
+
+
+def next_occurrence(banks: np.ndarray) -> np.ndarray:
+    """`table[c, v, r]` is the first column at or after c in bank r holding digit v, or cols if none does"""
+    rows, cols = banks.shape
+    table = np.empty((cols + 1, 10, rows), dtype=np.int16 if cols < np.iinfo(np.int16).max else np.int32)
+    table[cols] = cols
+    r = np.arange(rows)
+    # Sweep from the right, each column copying the one after it and then marking its own digits
+    columns = np.ascontiguousarray(banks.T)
+    for c in range(cols - 1, -1, -1):
+        table[c] = table[c + 1]
+        table[c, columns[c], r] = c
+    return table
+
+
+def _select(table: np.ndarray, digits: int) -> np.ndarray:
+    """Greedily pick the largest digit left in each bank's window, `digits` times over"""
+    cols, rows = len(table) - 1, table.shape[2]
+    r = np.arange(rows)
+    # Python ints once the answer could overflow an int64
+    joltage = np.zeros(rows, dtype=np.int64 if digits < 19 else object)
+    # Left-most allowed column for the next digit in each bank
+    lo = np.zeros(rows, dtype=np.intp)
+    for d in range(digits):
+        # Leave room for the digits still to be picked
+        hi = cols - digits + d
+        best = np.full(rows, -1, dtype=np.int64)
+        j = np.zeros(rows, dtype=np.intp)
+        # The first occurrence of the highest digit that is in the window
+        for v in range(9, -1, -1):
+            pos = table[lo, v, r]
+            hit = (best < 0) & (pos <= hi)
+            best[hit] = v
+            j[hit] = pos[hit]
+        joltage = 10 * joltage + best.astype(joltage.dtype)
+        lo = j + 1
+    return joltage
+
+
+def solve_batch(banks: np.ndarray, digits: int | Sequence[int], block_cells: int = BLOCK_CELLS):
+    """
+    Solve the problem for every row of banks at once
+
+    Returns an array with the answer for each bank, or a list of such arrays when
+    several values of digits are given. Next-occurrence tables are built for a block of
+    banks at a time in O(10 * cells), after which each digit picked costs O(10) per bank,
+    so the work is linear in the input whatever the number of digits.
+    """
+    single = isinstance(digits, int)
+    wanted = [digits] if single else list(digits)
+    rows, cols = banks.shape
+    step = max(1, block_cells // max(cols, 1))
+    results: list[list[np.ndarray]] = [[] for _ in wanted]
+    for start in range(0, rows, step):
+        table = next_occurrence(banks[start:start + step])
+        for result, k in zip(results, wanted):
+            result.append(_select(table, k))
+    answers = [np.concatenate(result) if result else np.zeros(0, dtype=np.int64) for result in results]
+    return answers[0] if single else answers
 
 
 def main():
     """Run the solutions and print the results"""
     print(__doc__)
     # Parse inputs
-    data = parse(input_path)
+    banks = parse_array(input_path)
+    part_one, part_two = solve_batch(banks, (2, 12))
+    # Summed as Python ints, since millions of 12 digit joltages overflow an int64
     # Part 1
-    print(f"Part 1: {sum(solve(line, 2) for line in data)}")
+    print(f"Part 1: {sum(part_one.tolist())}")
     # Part 2
-    print(f"Part 2: {sum(solve(line, 12) for line in data)}")
+    print(f"Part 2: {sum(part_two.tolist())}")
 
 
 if __name__ == '__main__':
@@ -1,53 +1,224 @@
 """AoC :: Day 4"""
+from collections import deque
+from dataclasses import dataclass
 import numpy as np
 from pathlib import Path
-# This speeds things up significantly
-from scipy.signal import convolve2d
+
+from aoc import instrument
+from aoc.grid import load_grid, symbol_mask
 
 # Constants
 input_path = Path(__file__).parent / "Day04.in"
 ROLL_SYMBOL = "@"
+# Rows expanded at a time when working on bit-packed grids
+PACKED_BLOCK_ROWS = 4096
 
 
 def parse(path: Path):
     """Parse the plaintext input"""
-    lines = path.read_text().strip().splitlines()
-    rows, cols = len(lines), len(lines[0])
-
-    # init a np.ndarray
-    array = np.zeros((rows, cols), dtype=bool)
-    for row, line in enumerate(lines):
-        for j, c in enumerate(line):
-            array[row, j] = c == ROLL_SYMBOL
-    return array
+    return symbol_mask(load_grid(path), ROLL_SYMBOL)
 
 
 # Part one effectively implements a CNN convolution over the input data
 FILTER = np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]])
 
 
+def convolve(data: np.ndarray, kernel: np.ndarray = FILTER) -> np.ndarray:
+    """
+    Zero-filled same-size convolution with a small kernel as a sum of shifted slices
+
+    Does the job of scipy.signal.convolve2d for a 3x3 kernel without importing scipy.
+    """
+    rows, cols = data.shape
+    kr, kc = kernel.shape
+    padded = np.pad(data.astype(np.uint8), ((kr // 2, kr // 2), (kc // 2, kc // 2)))
+    total = np.zeros((rows, cols), dtype=np.int64)
+    # Flip the kernel, as a convolution does
+    for (dr, dc), weight in np.ndenumerate(kernel[::-1, ::-1]):
+        if weight:
+            total += weight * padded[dr:dr + rows, dc:dc + cols]
+    return total
+
+
 def part_one(data: np.ndarray, adj: int = 4):
     """Solution to part one"""
     # Convolve to count neighbors for each cell
-    neighbor_count = convolve2d(data, FILTER, mode="same", boundary="fill", fillvalue=0)
+    neighbor_count = convolve(data)
     # Cell is True if it's set AND has fewer than `adj` neighbors
     return data & (neighbor_count < adj)
 
 
-def part_two(data: np.ndarray, coord_mat: np.ndarray):
+def part_two(data: np.ndarray, coord_mat: np.ndarray, adj: int = 4):
     """
     Solution to part two
 
     Expects the output of part one as input to save one step of computation.
+    Removing a roll only lowers the neighbor counts around it, so rolls are peeled off
+    a worklist and only their neighbors are revisited.
+    """
+    rows, cols = data.shape
+    width = cols + 2
+    # Flatten with a one cell border so that neighbors never wrap around, into bytearrays
+    # so that no Python object is made per cell
+    rolls = bytearray(np.pad(data, 1).astype(np.uint8).tobytes())
+    counts = bytearray(np.pad(convolve(data), 1).astype(np.uint8).tobytes())
+    seeds = np.pad(coord_mat, 1).ravel()
+    queued = bytearray(seeds.astype(np.uint8).tobytes())
+    worklist = deque(np.flatnonzero(seeds).tolist())
+    offsets = [dr * width + dc for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc]
+
+    removed = 0
+    # The worklist is first in first out, so it peels whole rounds in turn and a new round
+    # begins once every cell queued before the last one began has been removed
+    rounds = round_end = 0
+    while worklist:
+        if removed == round_end:
+            rounds += 1
+            round_end += len(worklist)
+        cell = worklist.popleft()
+        rolls[cell] = 0
+        removed += 1
+        for offset in offsets:
+            neighbor = cell + offset
+            if rolls[neighbor]:
+                counts[neighbor] -= 1
+                if not queued[neighbor] and counts[neighbor] < adj:
+                    queued[neighbor] = 1
+                    worklist.append(neighbor)
+    if instrument.ENABLED:
+        instrument.count("day04.peel_rounds", rounds)
+        instrument.count("day04.peeled", removed)
+
+    # Update data with removed rolls
+    data &= np.frombuffer(rolls, dtype=bool).reshape(rows + 2, width)[1:-1, 1:-1]
+    return removed
+
+
+@dataclass
+class PackedGrid:
+    """A boolean grid with each row bit-packed into uint64 words, column j in bit j % 64 of word j // 64"""
+    words: np.ndarray
+    cols: int
+
+    @property
+    def rows(self) -> int:
+        return self.words.shape[0]
+
+    def unpack(self) -> np.ndarray:
+        """Expand back into a boolean array"""
+        bits = np.unpackbits(self.words.view(np.uint8), axis=1, bitorder="little")
+        return bits[:, :self.cols].astype(bool)
+
+    def sum(self) -> int:
+        return int(np.bitwise_count(self.words).sum())
+
+
+def _pack_rows(rows: np.ndarray) -> np.ndarray:
+    """Pack a boolean array into rows of little-endian uint64 words"""
+    packed = np.packbits(rows, axis=1, bitorder="little")
+    # Pad each row out to a whole number of words
+    padding = -packed.shape[1] % 8
+    if padding:
+        packed = np.pad(packed, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(packed).view("<u8")
+
+
+def parse_packed(path: Path, block_rows: int = PACKED_BLOCK_ROWS) -> PackedGrid:
+    """Parse the plaintext input straight from its bytes into a PackedGrid"""
+    chars = load_grid(path)
+    rows, cols = chars.shape
+    # Only one block of rows is ever expanded to a byte per cell
+    words = np.empty((rows, -(-cols // 64)), dtype=np.uint64)
+    for r in range(0, rows, block_rows):
+        words[r:r+block_rows] = _pack_rows(symbol_mask(chars[r:r+block_rows], ROLL_SYMBOL))
+    return PackedGrid(words, cols)
+
+
+def _shift_up(words: np.ndarray) -> np.ndarray:
+    """Move every bit one column to the right (bit j -> j + 1), carrying across words"""
+    shifted = words << np.uint64(1)
+    shifted[:, 1:] |= words[:, :-1] >> np.uint64(63)
+    return shifted
+
+
+def _shift_down(words: np.ndarray) -> np.ndarray:
+    """Move every bit one column to the left (bit j -> j - 1), carrying across words"""
+    shifted = words >> np.uint64(1)
+    shifted[:, :-1] |= words[:, 1:] << np.uint64(63)
+    return shifted
+
+
+def _accessible(words: np.ndarray, idx: np.ndarray, adj: int) -> np.ndarray:
+    """
+    Packed rolls in rows idx with fewer than `adj` neighbors
+
+    The eight neighbor bit planes are summed with a bit-sliced ripple adder into a 4 bit
+    count per cell, which is then compared against `adj` bit by bit.
+    """
+    zero = np.uint64(0)
+    mid = words[idx]
+    up = words[np.maximum(idx - 1, 0)]
+    up[idx == 0] = zero
+    down = words[np.minimum(idx + 1, words.shape[0] - 1)]
+    down[idx == words.shape[0] - 1] = zero
+
+    planes = [_shift_up(up), up, _shift_down(up), _shift_up(mid), _shift_down(mid), _shift_up(down), down, _shift_down(down)]
+    count = [np.zeros_like(mid) for _ in range(4)]
+    for carry in planes:
+        for k, bit in enumerate(count):
+            count[k], carry = bit ^ carry, bit & carry
+
+    # count < adj, comparing from the most significant bit down
+    less = np.zeros_like(mid)
+    equal = ~less
+    for k in reversed(range(4)):
+        if adj >> k & 1:
+            less |= equal & ~count[k]
+            equal &= count[k]
+        else:
+            equal &= ~count[k]
+    return mid & less
+
+
+def part_one_packed(grid: PackedGrid, adj: int = 4, block_rows: int = PACKED_BLOCK_ROWS) -> PackedGrid:
+    """Solution to part one on a PackedGrid, returning the accessible rolls packed the same way"""
+    accessible = np.empty_like(grid.words)
+    for r in range(0, grid.rows, block_rows):
+        idx = np.arange(r, min(r + block_rows, grid.rows))
+        accessible[idx] = _accessible(grid.words, idx, adj)
+    return PackedGrid(accessible, grid.cols)
+
+
+def part_two_packed(data: PackedGrid, coord_mat: PackedGrid, adj: int = 4):
+    """
+    Solution to part two on a PackedGrid
+
+    Expects the output of part one as input, like part_two. Only rows next to a row
+    that lost rolls in the previous round are re-examined.
     """
-    move_map = np.zeros(data.shape, dtype=bool)
-    while coord_mat.any():
-        # Update data with removed rolls
-        move_map |= coord_mat
-        data &= ~coord_mat
-        # Get new coords
-        coord_mat = part_one(data)
-    return np.sum(move_map)
+    words = data.words
+    removed = coord_mat.sum()
+    words &= ~coord_mat.words
+    dirty = coord_mat.words.any(axis=1)
+    rounds = int(dirty.any())
+    while dirty.any():
+        # Rows adjacent to a removal may have gained accessible rolls
+        near = dirty.copy()
+        near[1:] |= dirty[:-1]
+        near[:-1] |= dirty[1:]
+        idx = np.flatnonzero(near)
+        accessible = _accessible(words, idx, adj)
+        changed = accessible.any(axis=1)
+        idx, accessible = idx[changed], accessible[changed]
+        removed += int(np.bitwise_count(accessible).sum())
+        words[idx] &= ~accessible
+        dirty = np.zeros(data.rows, dtype=bool)
+        dirty[idx] = True
+        rounds += len(idx) > 0
+    if instrument.ENABLED:
+        instrument.count("day04.peel_rounds", rounds)
+        instrument.count("day04.peeled", int(removed))
+    return removed
 
 
 def main():
@@ -1,9 +1,17 @@
 """AoC :: Day 5"""
+from bisect import bisect_right
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, Self
+
+if TYPE_CHECKING:
+    import numpy as np
 
 # Constants
 input_path = Path(__file__).parent / 'Day05.in'
+# Fewer ids than this are checked one at a time in pure Python, which is quicker than
+# importing numpy
+SMALL_BATCH = 1 << 17
 
 
 @dataclass
@@ -20,6 +28,44 @@ class Range:
     def check(self, i: int):
         return self.start <= i <= self.stop
 
+@dataclass
+class RangeIndex:
+    """Disjoint, sorted inclusive intervals covering the union of a list of ranges"""
+    starts: list[int]
+    stops: list[int]
+
+    @classmethod
+    def from_ranges(cls, data: list[Range]) -> Self:
+        """Sort the ranges by start and sweep once to merge any that overlap"""
+        starts: list[int] = []
+        stops: list[int] = []
+        for r in sorted(data, key=lambda r: r.start):
+            if stops and r.start <= stops[-1] + 1:
+                stops[-1] = max(stops[-1], r.stop)
+            else:
+                starts.append(r.start)
+                stops.append(r.stop)
+        return cls(starts, stops)
+
+    def check(self, i: int) -> bool:
+        """check a single id with a binary search"""
+        j = bisect_right(self.starts, i) - 1
+        return j >= 0 and i <= self.stops[j]
+
+    def check_batch(self, ids: "np.ndarray") -> "np.ndarray":
+        """check a whole array of ids with one vectorized binary search"""
+        import numpy as np
+        if not self.starts:
+            return np.zeros(np.shape(ids), dtype=bool)
+        starts, stops = np.array(self.starts, dtype=np.int64), np.array(self.stops, dtype=np.int64)
+        j = np.searchsorted(starts, ids, side="right") - 1
+        return (j >= 0) & (ids <= stops[np.maximum(j, 0)])
+
+    def total(self) -> int:
+        """number of ids covered by the index"""
+        return sum(stop - start + 1 for start, stop in zip(self.starts, self.stops))
+
+
 def parse(path: Path):
     """Parse the plaintext input"""
     ranges, ingredients = path.read_text().split("\n\n")
@@ -28,22 +74,18 @@ def parse(path: Path):
 
 def part_one(data: list[Range], ids: list[int]):
     """Solution to part one"""
-    return sum(1 for i in ids if any(r.check(i) for r in data))
+    index = RangeIndex.from_ranges(data)
+    if len(ids) < SMALL_BATCH:
+        return sum(1 for i in ids if index.check(i))
+    import numpy as np
+    return int(index.check_batch(np.asarray(ids, dtype=np.int64)).sum())
 
 
 def part_two(data: list[Range]):
     """
     Solution to part two
     """
-    sorted_ranges = sorted(data, key=lambda r: r.start)
-    end = sorted_ranges[0].start - 1
-    total = 0
-
-    for r in sorted_ranges:
-        total += max(0, r.stop + 1 - max(r.start, end))
-        end = max(end, r.stop+1)
-
-    return total
+    return RangeIndex.from_ranges(data).total()
 
 
 def main():
@@ -2,11 +2,19 @@
 from dataclasses import dataclass
 import math
 from pathlib import Path
-import re
-from typing import Literal, Self
+from typing import TYPE_CHECKING, Iterator, Literal, Self
+
+if TYPE_CHECKING:
+    import numpy as np
 
 # Constants
 input_path = Path(__file__).parent / 'Day06.in'
+# Inputs smaller than this many bytes are read in pure Python, which is quicker than
+# importing numpy
+SMALL_INPUT = 1 << 17
+SPACE, ZERO = ord(" "), ord("0")
+DIGITS = "0123456789"
+OPS = {ord("*"): "*", ord("+"): "+"}
 
 @dataclass
 class Problem:
@@ -33,41 +41,138 @@ class Problem:
                 return sum(self.numbers)
 
 
-def parse(path: Path):
-    """Parse the plaintext input"""
-    # specify pattern
-    re_whitespace = re.compile(r"\s+")
-    lines = [re_whitespace.split(line.strip()) for line in path.read_text().strip().splitlines()]
-    return [Problem.parse(ns, op) for *ns, op in zip(*lines)]
-
+def _place_values(digits: "np.ndarray", is_digit: "np.ndarray", axis: int, starts: "np.ndarray | None" = None) -> "np.ndarray":
+    """
+    Read runs of digits along an axis as numbers
 
-def part_one(data: list[Problem]):
-    """Solution to part one"""
-    return sum(p.solve() for p in data)
+    Each digit is scaled by 10 to the power of the number of digits after it in its run,
+    where runs are whole lines along the axis or segments of it beginning at `starts`.
+    """
+    import numpy as np
+    seen = np.cumsum(is_digit, axis=axis) - is_digit
+    if starts is None:
+        count = is_digit.sum(axis=axis, keepdims=True)
+    else:
+        # Restart the count at the beginning of every segment
+        segment = np.cumsum(np.isin(np.arange(is_digit.shape[axis]), starts)) - 1
+        seen -= np.take(np.take(seen, starts, axis=axis), segment, axis=axis)
+        count = np.take(np.add.reduceat(is_digit, starts, axis=axis), segment, axis=axis)
+    power = np.where(is_digit, count - seen - 1, 0)
+    return np.where(is_digit, digits * 10**power, 0)
 
 
-def parse_differently(path: Path):
-    """Parse the plaintext input ... differently"""
-    *number_lines, op_line = path.read_text().splitlines()
-    # Find the */+ indices in the string
-    re_op = re.compile(r"\+\s+|\*\s+")
-    op_matches = re_op.finditer(op_line)
+@dataclass
+class Worksheet:
+    """Every problem on the worksheet, read both row-wise and column-wise, as flat lists or arrays"""
+    row_numbers: "list[int] | np.ndarray"
+    row_offsets: "list[int] | np.ndarray"
+    column_numbers: "list[int] | np.ndarray"
+    column_offsets: "list[int] | np.ndarray"
+    operations: "list[int] | np.ndarray"
+
+    def problems(self, column_wise: bool = False) -> Iterator[Problem]:
+        """Build a Problem for each entry on the worksheet"""
+        numbers = self.column_numbers if column_wise else self.row_numbers
+        offsets = self.column_offsets if column_wise else self.row_offsets
+        bounds = [*offsets, len(numbers)]
+        for start, stop, op in zip(bounds[:-1], bounds[1:], self.operations):
+            yield Problem([int(n) for n in numbers[start:stop]], OPS[op])
+
+
+def read_worksheet(text: str) -> Worksheet:
+    """Read the numbers off both ways with string operations, giving the same Worksheet as parse"""
+    lines = text.rstrip("\r\n").splitlines()
+    width = max(map(len, lines))
+    lines = [line.ljust(width) for line in lines]
+    columns = ["".join(column) for column in zip(*lines)]
+
+    worksheet = Worksheet([], [], [], [], [])
+    # Problems are separated by columns of nothing but spaces
+    start = None
+    for col, column in enumerate(columns + [" "]):
+        if column.strip():
+            start = col if start is None else start
+            continue
+        if start is None:
+            continue
+        op = max(lines[-1][start:col])
+        if op not in "*+":
+            raise ValueError(f"op should be one of '+' or '*', got {op}")
+        worksheet.operations.append(ord(op))
+        # Part one reads along the rows of each problem
+        worksheet.row_offsets.append(len(worksheet.row_numbers))
+        for line in lines[:-1]:
+            worksheet.row_numbers.append(int("".join(c for c in line[start:col] if c in DIGITS) or 0))
+        # Part two reads down the columns, skipping any without digits
+        worksheet.column_offsets.append(len(worksheet.column_numbers))
+        for column in columns[start:col]:
+            if digits := "".join(c for c in column[:-1] if c in DIGITS):
+                worksheet.column_numbers.append(int(digits))
+        start = None
+    return worksheet
 
-    def construct_from_match(op_match: re.Match):
-        """use the op_match to construct the number square"""
-        start, stop = op_match.span()
-        return [n for i in range(start, stop) if (n := ("".join(number_line[i] for number_line in number_lines)).strip())]
 
-    # Parse the numbers accordingly
-    return [Problem.parse(construct_from_match(op_match), op_match.group(0).strip()) for op_match in op_matches]
+def parse(path: Path):
+    """Parse the plaintext input once as a character array and read the numbers off both ways"""
+    if path.stat().st_size < SMALL_INPUT:
+        return read_worksheet(path.read_text())
+    import numpy as np
+    *number_lines, op_line = path.read_bytes().rstrip(b"\r\n").splitlines()
+    lines = number_lines + [op_line]
+    chars = np.full((len(lines), max(map(len, lines))), SPACE, dtype=np.uint8)
+    for row, line in enumerate(lines):
+        chars[row, :len(line)] = np.frombuffer(line, dtype=np.uint8)
+
+    # Problems are separated by columns of nothing but spaces
+    blank = (chars == SPACE).all(axis=0)
+    chars = chars[:, ~blank]
+    starts = np.flatnonzero(np.diff(blank.astype(np.int8), prepend=1) == -1)
+    # Index of each start once the blank columns are dropped
+    starts -= np.cumsum(blank)[starts]
+
+    operations = np.maximum.reduceat(chars[-1], starts)
+    if not np.isin(operations, list(OPS)).all():
+        raise ValueError(f"op should be one of '+' or '*', got {set(map(chr, operations)) - set(OPS.values())}")
+
+    digits = chars[:-1].astype(np.int64) - ZERO
+    is_digit = (digits >= 0) & (digits <= 9)
+
+    # Part one reads along the rows of each problem
+    row_numbers = np.add.reduceat(_place_values(digits, is_digit, 1, starts), starts, axis=1).T.ravel()
+    row_offsets = np.arange(len(starts)) * len(number_lines)
+
+    # Part two reads down the columns, skipping any without digits
+    column_numbers = _place_values(digits, is_digit, 0).sum(axis=0)
+    has_digits = is_digit.any(axis=0)
+    column_offsets = (np.cumsum(has_digits) - has_digits)[starts]
+
+    return Worksheet(row_numbers, row_offsets, column_numbers[has_digits], column_offsets, operations)
+
+
+def grand_total(numbers: "list[int] | np.ndarray", offsets: "list[int] | np.ndarray", operations: "list[int] | np.ndarray") -> int:
+    """Solve every problem and add up the answers without building Problem objects"""
+    if isinstance(numbers, list):
+        bounds = [*offsets, len(numbers)]
+        return sum(
+            math.prod(numbers[start:stop]) if op == ord("*") else sum(numbers[start:stop])
+            for start, stop, op in zip(bounds[:-1], bounds[1:], operations)
+        )
+    import numpy as np
+    multiply = operations == ord("*")
+    sums = np.add.reduceat(numbers, offsets)
+    # Products can outgrow an int64, so use Python ints
+    products = np.multiply.reduceat(numbers.astype(object), offsets)
+    return int(sums[~multiply].sum()) + int(products[multiply].sum())
+
+
+def part_one(data: Worksheet):
+    """Solution to part one"""
+    return grand_total(data.row_numbers, data.row_offsets, data.operations)
 
 
-def part_two(path: Path):
+def part_two(data: Worksheet):
     """Solution to part two"""
-    # We need to parse it again
-    data = parse_differently(path)
-    # Then do part one again
-    return part_one(data)
+    return grand_total(data.column_numbers, data.column_offsets, data.operations)
 
 
 def main():
@@ -78,7 +183,7 @@ def main():
     # Part 1
     print(f"Part 1: {part_one(data)}")
     # Part 2
-    print(f"Part 2: {part_two(input_path)}")
+    print(f"Part 2: {part_two(data)}")
 
 
 if __name__ == '__main__':
@@ -1,61 +1,114 @@
 """AoC :: Day 7"""
+import itertools
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    import numpy as np
 
 # Constants
 input_path = Path(__file__).parent / 'Day07.in'
+# Inputs smaller than this many bytes are read in pure Python, which is quicker than
+# importing numpy
+SMALL_INPUT = 1 << 20
 START_SYMBOL = "S"
 SPLITTER_SYMBOL = "^"
 
 def parse(path: Path):
-    """Parse the plaintext input"""
-    start_line, *lines = path.read_text().strip().splitlines()
+    """
+    Parse the plaintext input
+
+    A small manifold is read into the set of splitter columns on each row. A large one
+    stays memory-mapped, so the solvers stream it one row at a time.
+    """
+    if path.stat().st_size < SMALL_INPUT:
+        start_line, *lines = path.read_text().strip().splitlines()
+        # S should be on first line
+        start_index = start_line.index(START_SYMBOL)
+        # Record index of each splitter in string
+        return start_index, [{i for i, char in enumerate(line) if char == SPLITTER_SYMBOL} for line in lines]
+    import numpy as np
+    from aoc.grid import load_grid, symbol_mask
+    grid = load_grid(path)
     # S should be on first line
-    start_index = start_line.index(START_SYMBOL)
-    # Record index of each splitter in string
-    splitters = [{i for i, char in enumerate(line) if char == "^"} for line in lines]
-    return start_index, splitters
+    start_index = int(np.flatnonzero(symbol_mask(grid[0], START_SYMBOL))[0])
+    return start_index, grid[1:]
+
 
+def to_bitset(row: "set[int] | np.ndarray") -> int:
+    """Pack the splitters in a row of the manifold into an int with bit i set for a splitter at i"""
+    if isinstance(row, set):
+        return sum(1 << i for i in row)
+    import numpy as np
+    from aoc.grid import symbol_mask
+    return int.from_bytes(np.packbits(symbol_mask(row, SPLITTER_SYMBOL), bitorder="little").tobytes(), "little")
 
-def part_one(start_index: int, splitters: list[set[int]]):
+
+def part_one(start_index: int, rows: "Iterable[set[int]] | Iterable[np.ndarray]"):
     """Solution to part one"""
     # init beams and counter
-    beams = {start_index}
+    beams = 1 << start_index
     ctr = 0
     # calculate splits on each line
-    for line in splitters:
-        hit_idxs = beams & line
-        beams -= hit_idxs
-        beams |= {i for h in hit_idxs for i in (h-1, h+1)}
-        ctr += len(hit_idxs)
+    for row in rows:
+        hits = beams & to_bitset(row)
+        beams = (beams ^ hits) | (hits << 1) | (hits >> 1)
+        ctr += hits.bit_count()
     return ctr
 
 
-def part_two(start_index: int, splitters: list[set[int]]):
+def part_two(start_index: int, rows: "Iterable[set[int]] | Iterable[np.ndarray]"):
     """Solution to part two"""
-    # init beams and counter
-    beams = {start_index: 1}
+    if isinstance(rows, list):
+        # init beams and counter
+        beams = {start_index: 1}
+        # calculate splits on each line
+        for line in rows:
+            new_beams = {}
+            for beam, count in beams.items():
+                if beam in line:
+                    new_beams[beam-1] = new_beams.get(beam-1, 0) + count
+                    new_beams[beam+1] = new_beams.get(beam+1, 0) + count
+                else:
+                    new_beams[beam] = new_beams.get(beam, 0) + count
+            beams = new_beams
+        return sum(beams.values())
+    import numpy as np
+    from aoc.grid import symbol_mask
+    # init beams, with an extra column either side for beams split off the edge
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 1
+    beams = np.zeros(len(first) + 2, dtype=np.int64)
+    beams[start_index + 1] = 1
+    # The total number of beams, kept as a Python int. A row of splits at most doubles
+    # it, and while it fits in an int64 no cell, nor any sum of cells, can overflow
+    total = 1
     # calculate splits on each line
-    for line in splitters:
-        new_beams = {}
-        for beam, count in beams.items():
-            if beam in line:
-                new_beams[beam-1] = new_beams.get(beam-1, 0) + count
-                new_beams[beam+1] = new_beams.get(beam+1, 0) + count
-            else:
-                new_beams[beam] = new_beams.get(beam, 0) + count
-        beams = new_beams
-    return sum(beams.values())
+    for row in itertools.chain([first], rows):
+        # Switch to Python ints before a split could overflow an int64
+        if beams.dtype != object and 2 * total > np.iinfo(np.int64).max:
+            beams = beams.astype(object)
+        hits = np.zeros(len(beams), dtype=bool)
+        hits[1:-1] = symbol_mask(row, SPLITTER_SYMBOL)
+        split = np.where(hits, beams, 0)
+        total += int(split.sum())
+        beams = np.where(hits, 0, beams)
+        beams[:-1] += split[1:]
+        beams[1:] += split[:-1]
+    return total
 
 
 def main():
     """Run the solutions and print the results"""
     print(__doc__)
     # Parse inputs
-    start_index, splitters = parse(input_path)
+    start_index, rows = parse(input_path)
     # Part 1
-    print(f"Part 1: {part_one(start_index, splitters)}")
+    print(f"Part 1: {part_one(start_index, rows)}")
     # Part 2
-    print(f"Part 2: {part_two(start_index, splitters)}")
+    print(f"Part 2: {part_two(start_index, rows)}")
 
 
 if __name__ == '__main__':
@@ -1,14 +1,24 @@
 """AoC :: Day 8"""
 from dataclasses import dataclass
+import heapq
+import itertools
 from math import prod
 from pathlib import Path
-from typing import Self
+from typing import Iterator, Self
 
-import networkx as nx
+import numpy as np
+
+from aoc import instrument
 
 # Constants
 input_path = Path(__file__).parent / "Day08.in"
 LIMIT: int = 1000
+# Nearest neighbors first queried for each box when generating candidate edges
+NEIGHBORS: int = 16
+# Up to this many boxes every pair is sorted outright, which also avoids importing scipy
+BRUTE_FORCE_LIMIT: int = 1000
+# Edges converted at a time when every pair is sorted
+CHUNK: int = 4096
 
 
 @dataclass
@@ -31,40 +41,159 @@ class JunctionBox:
         return (self.x - other.x)**2 + (self.y - other.y)**2 + (self.z - other.z)**2
 
 
+class DisjointSet:
+    """Union-find over the integers 0..n-1 with union by size and path compression"""
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+        self.components = n
+
+    def find(self, i: int) -> int:
+        """returns the root of the set containing i"""
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Point everything on the path straight at the root
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i: int, j: int) -> bool:
+        """merge the sets containing i and j, returning False if they were already joined"""
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return False
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+        self.components -= 1
+        return True
+
+    def component_sizes(self) -> list[int]:
+        """sizes of every set"""
+        return [self.size[i] for i, p in enumerate(self.parent) if i == p]
+
+
 def parse(path: Path):
     """Parse the plaintext input"""
     return [JunctionBox.parse(row) for row in path.read_text().strip().splitlines()]
 
 
+def coordinates(data: list[JunctionBox]) -> np.ndarray:
+    """Stack the box coordinates into an (n, 3) int64 array"""
+    return np.array([(box.x, box.y, box.z) for box in data], dtype=np.int64).reshape(-1, 3)
+
+
+def all_pairs(points: np.ndarray) -> Iterator[tuple[int, int, int]]:
+    """Every (dist2, i, j) with i < j, sorted outright"""
+    with instrument.phase("day08.all_pairs"):
+        i, j = np.triu_indices(len(points), 1)
+        dist2 = ((points[i] - points[j]) ** 2).sum(axis=1)
+        # The pairs start out in (i, j) order, so a stable sort settles ties the same way
+        order = np.argsort(dist2, kind="stable")
+    # Only convert as many edges to Python ints as are asked for
+    for start in range(0, len(order), CHUNK):
+        chunk = order[start:start + CHUNK]
+        yield from zip(dist2[chunk].tolist(), i[chunk].tolist(), j[chunk].tolist())
+
+
+def candidate_edges(points: np.ndarray, k: int = NEIGHBORS) -> Iterator[tuple[int, int, int]]:
+    """
+    Lazily yield every (dist2, i, j) with i < j in the same order as sorting all pairs
+
+    Each box streams its nearest neighbors from a KD-tree query and the streams are merged
+    with a heap, so every edge comes up once from each end. A neighbor list is only trusted
+    strictly below the distance of the furthest neighbor returned, and a box's query is
+    widened (doubling k) once its list runs dry.
+    """
+    n = len(points)
+    if n <= BRUTE_FORCE_LIMIT:
+        yield from all_pairs(points)
+        return
+    from scipy.spatial import cKDTree
+    tree = cKDTree(points)
+    # Number of neighbors queried so far and the last edge taken for each box
+    queried = [0] * n
+    last: list[tuple[int, int, int]] = [(-1, -1, -1)] * n
+
+    def neighbors(boxes: np.ndarray, k: int) -> list[list[tuple[int, int, int]]]:
+        """The next edges of each box that are safe to yield from a k nearest query"""
+        k = min(k + 1, n)
+        _, idx = tree.query(points[boxes], k=list(range(1, k + 1)))
+        dist2 = ((points[idx] - points[boxes, None]) ** 2).sum(axis=2)
+        # Beyond the furthest neighbor there could be ties that the query left out
+        cutoff = dist2.max(axis=1) if k < n else np.full(len(boxes), np.iinfo(np.int64).max)
+        rows = []
+        for row, (i, cut) in enumerate(zip(boxes.tolist(), cutoff.tolist())):
+            queried[i] = k - 1
+            rows.append(sorted(
+                edge for d2, j in zip(dist2[row].tolist(), idx[row].tolist())
+                if j != i and d2 < cut and (edge := (d2, min(i, j), max(i, j))) > last[i]
+            ))
+        return rows
+
+    def refill(i: int) -> list[tuple[int, int, int]]:
+        """Widen the query for box i until it has more edges or has seen every other box"""
+        edges: list[tuple[int, int, int]] = []
+        while not edges and queried[i] < n - 1:
+            if instrument.ENABLED:
+                instrument.count("day08.requeries")
+            edges = neighbors(np.array([i]), max(1, 2 * queried[i]))[0]
+        return edges
+
+    with instrument.phase("day08.kd_query"):
+        pending = neighbors(np.arange(n), k)
+        pending = [edges or refill(i) for i, edges in enumerate(pending)]
+    cursor = [0] * n
+    heap = [(*edges[0], i) for i, edges in enumerate(pending) if edges]
+    heapq.heapify(heap)
+    previous = None
+    while heap:
+        d2, a, b, i = heapq.heappop(heap)
+        last[i] = (d2, a, b)
+        # The second copy of an edge comes straight after the first
+        if (d2, a, b) != previous:
+            previous = d2, a, b
+            yield previous
+        # Move box i on to its next neighbor
+        cursor[i] += 1
+        if cursor[i] == len(pending[i]):
+            pending[i], cursor[i] = refill(i), 0
+        if cursor[i] < len(pending[i]):
+            heapq.heappush(heap, (*pending[i][cursor[i]], i))
+
+
 def solution_generator(data: list[JunctionBox], limit: int = LIMIT):
     """A generator that yields the solutions to both parts"""
-    # All pairs possible sorted from closest to furthest away
-    dist2_ranked_pairs = sorted(
-        ((j1.dist2(j2), (j1, j2)) for i, j1 in enumerate(data) for j2 in data[i+1:]),
-        key=lambda t: t[0],
-    )
+    # All pairs possible from closest to furthest away, generated as they are needed
+    dist2_ranked_pairs = candidate_edges(coordinates(data))
 
-    graph: nx.Graph[JunctionBox] = nx.Graph()
-    remaining_nodes = set(data)
+    circuits = DisjointSet(len(data))
 
-    # Determine edges
-    for _, (j1, j2) in dist2_ranked_pairs[:limit]:
-        graph.add_edge(j1, j2)
-        remaining_nodes -= {j1, j2}
+    # Determine edges, which may be fewer than the limit if there are not enough pairs
+    consumed = 0
+    for consumed, (_, i1, i2) in enumerate(itertools.islice(dist2_ranked_pairs, limit), 1):
+        circuits.union(i1, i2)
 
+    if instrument.ENABLED:
+        instrument.count("day08.edges_consumed", consumed)
     # Yield solution to part one
-    yield prod(
-        sorted(map(len, nx.connected_components(graph)))[-3:]
-    )
-
-    # Continue on until it is one connected component
-    for _, (j1, j2) in dist2_ranked_pairs[limit:]:
-        graph.add_edge(j1, j2)
-        remaining_nodes -= {j1, j2}
-        if not remaining_nodes and nx.is_connected(graph):
+    yield prod(heapq.nlargest(3, circuits.component_sizes()))
+
+    # Continue on until it is one connected component, counting the edges taken since
+    consumed = 0
+    for consumed, (_, i1, i2) in enumerate(dist2_ranked_pairs, 1):
+        circuits.union(i1, i2)
+        if circuits.components == 1:
+            if instrument.ENABLED:
+                instrument.count("day08.edges_consumed", consumed)
             # Yield solution to part two
-            yield j1.x * j2.x
+            yield data[i1].x * data[i2].x
+            return
 
+    if instrument.ENABLED:
+        instrument.count("day08.edges_consumed", consumed)
     raise ValueError("graph was never connected")
 
 
@@ -1,11 +1,21 @@
 """AoC :: Day 9"""
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
 from functools import cached_property
 import heapq
 from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from aoc import instrument
 
 # Constants
 input_path = Path(__file__).parent / 'Day09.in'
+# Rows of corner pairs scanned at a time
+BLOCK = 256
+# Largest coordinate-compressed grid worth rasterizing for part two
+RASTER_CELLS = 1 << 24
 
 
 @dataclass(order=True)  # order=True so that we can put these in a heap
@@ -25,10 +35,6 @@ class Edge:
     def vertical(self):
         return self.t1.x == self.t2.x
     
-    def ray_cast(self, t: Tile):
-        """return True if t casts a ray through this edge"""
-        return (t.x < self.t1.x) and (min(self.t1.y, self.t2.y) < t.y < max(self.t1.y, self.t2.y))
-    
     @cached_property
     def xs(self):
         return sorted([self.t1.x, self.t2.x])
@@ -36,20 +42,202 @@ class Edge:
     @cached_property
     def ys(self):
         return sorted([self.t1.y, self.t2.y])
-    
-    def intersect(self, r1: Tile, r2: Tile):
-        """true if the edge crosses or is contained by rect formed using t1 and t2"""
-        mx, Mx = self.xs
-        my, My = self.ys
-        return (
-            mx < max(r1.x, r2.x) # Check the leftmost point on edge is left of rightmost point on rect
-        ) and (
-            Mx > min(r1.x, r2.x) # Check the rightmost point on edge is right of leftmost point on rect
-        ) and (
-            my < max(r1.y, r2.y) # Check if lowest point on edge is below highest part of rect
-        ) and (
-            My > min(r1.y, r2.y) # Check if highest point on edge is above lowest part of rect
-        )
+
+
+class StabbingIndex:
+    """
+    Closed integer intervals [lo, hi], each with a key, for finding the intervals covering a point
+
+    A segment tree over the slabs between interval ends stores each interval at O(log n)
+    nodes, each node holding its keys sorted. A query walks one leaf to root path and bisects
+    at every node, so listing the k keys in a range costs O(log² n + k).
+    """
+    def __init__(self, lo: list[int], hi: list[int], keys: list[int]):
+        self.bounds = sorted({*lo, *(b + 1 for b in hi)})
+        self.size = 1 << max(len(self.bounds) - 2, 0).bit_length()
+        nodes: list[list[int]] = [[] for _ in range(2 * self.size)]
+        for a, b, key in zip(lo, hi, keys):
+            l = bisect_left(self.bounds, a) + self.size
+            r = bisect_left(self.bounds, b + 1) + self.size
+            while l < r:
+                if l & 1:
+                    nodes[l].append(key)
+                    l += 1
+                if r & 1:
+                    r -= 1
+                    nodes[r].append(key)
+                l, r = l >> 1, r >> 1
+        self.nodes = [sorted(node) for node in nodes]
+
+    def keys(self, point: int, lo: int, hi: int) -> list[int]:
+        """Keys between lo and hi of the intervals covering the point, in no particular order"""
+        found: list[int] = []
+        slab = bisect_right(self.bounds, point) - 1
+        if 0 <= slab < len(self.bounds) - 1:
+            node = slab + self.size
+            while node:
+                keys = self.nodes[node]
+                found += keys[bisect_left(keys, lo):bisect_right(keys, hi)]
+                node >>= 1
+        return found
+
+
+class PolygonIndex:
+    """
+    The polygon edges indexed for point and rectangle queries on tiles
+
+    Vertical edges are grouped by column and horizontal edges kept in stabbing indexes over
+    their x spans, so the boundary of a column comes from just the edges on it or across it.
+    Each column a query lands on is then summarised once, as its runs of boundary tiles and
+    which gaps between them are outside, and later queries on it are a couple of bisects.
+    """
+    def __init__(self, data: list[Tile]):
+        edges = [Edge(t1, t2) for t1, t2 in zip(data, data[1:] + data[:1])]
+        vertical = sorted((e for e in edges if e.vertical()), key=lambda e: (e.t1.x, e.ys[0]))
+        horizontal = [e for e in edges if not e.vertical()]
+        self.bottom, self.top = min(t.y for t in data), max(t.y for t in data)
+        # Twice the signed area tells us which way round the polygon goes, and so which
+        # side of each vertical edge is outside
+        area2 = sum(e.t1.x * e.t2.y - e.t2.x * e.t1.y for e in edges)
+
+        # Sorted starts and ends of the vertical edges in each column
+        self.columns: dict[int, tuple[list[int], list[int]]] = {}
+        self.outside_right: dict[int, tuple[list[int], list[int]]] = {}
+        for e in vertical:
+            outside_right = (e.t2.y > e.t1.y) == (area2 > 0)
+            for spans in (self.columns, self.outside_right) if outside_right else (self.columns,):
+                starts, ends = spans.setdefault(e.t1.x, ([], []))
+                starts.append(e.ys[0])
+                ends.append(e.ys[1])
+        self.outside_xs = sorted(self.outside_right)
+        xs0, xs1, ys = [e.xs[0] for e in horizontal], [e.xs[1] for e in horizontal], [e.t1.y for e in horizontal]
+        self.rows = StabbingIndex(xs0, xs1, ys)
+        # A ray cast down just right of a tile in column x crosses the horizontal edges covering [x, x + 1)
+        self.crossings = StabbingIndex(xs0, [x - 1 for x in xs1], ys)
+        self.profiles: dict[int, tuple[list[int], list[int], list[int]]] = {}
+
+    def _profile(self, x: int) -> tuple[list[int], list[int], list[int]]:
+        """
+        Starts and ends of the merged runs of boundary tiles in column x, and a running count
+        of outside gaps, where gap g lies just below run g and outside[g] of the gaps before it are out
+        """
+        if (profile := self.profiles.get(x)) is not None:
+            return profile
+        runs = [*zip(*self.columns.get(x, ([], []))), *((y, y) for y in self.rows.keys(x, self.bottom, self.top))]
+        starts: list[int] = []
+        ends: list[int] = []
+        for a, b in sorted(runs):
+            if ends and a <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], b)
+            else:
+                starts.append(a)
+                ends.append(b)
+        # Tiles off the boundary change between in and out only across boundary tiles, so
+        # one ray cast from the bottom of each gap decides the whole gap
+        below = sorted(self.crossings.keys(x, self.bottom, self.top))
+        outside, k = [0], 0
+        for g in range(len(starts) + 1):
+            if 0 < g < len(starts):
+                while k < len(below) and below[k] <= ends[g - 1]:
+                    k += 1
+            outside.append(outside[-1] + (g in (0, len(starts)) or k % 2 == 0))
+        self.profiles[x] = profile = (starts, ends, outside)
+        return profile
+
+    def _column_inside(self, x: int, lo: int, hi: int) -> bool:
+        """True if every tile in column x between rows lo and hi is red or green"""
+        starts, ends, outside = self._profile(x)
+        # The gaps from first to last have tiles between lo and hi
+        first, last = bisect_right(starts, lo), bisect_left(ends, hi)
+        return first > last or outside[last + 1] == outside[first]
+
+    def _column_boundary(self, x: int, lo: int, hi: int) -> bool:
+        """True if every tile in column x between rows lo and hi is on the boundary"""
+        starts, ends, _ = self._profile(x)
+        return bisect_right(starts, lo) > bisect_left(ends, hi)
+
+    def inside(self, t: Tile) -> bool:
+        """True if the tile is red or green, i.e. on the boundary or inside it"""
+        return self._column_inside(t.x, t.y, t.y)
+
+    def contains(self, t1: Tile, t2: Tile) -> bool:
+        """
+        True if the rectangle with opposite corners t1 and t2 only covers red or green tiles
+
+        Walking left from any outside tile in the rectangle either reaches the rectangle's
+        left column or steps off a vertical edge with the outside on its right. So it is
+        enough to check the left column and the column just right of each such edge.
+        """
+        (x1, x2), (y1, y2) = sorted([t1.x, t2.x]), sorted([t1.y, t2.y])
+        if not self._column_inside(x1, y1, y2):
+            return False
+        for x in self.outside_xs[bisect_left(self.outside_xs, x1):bisect_left(self.outside_xs, x2)]:
+            starts, ends = self.outside_right[x]
+            for k in range(bisect_left(ends, y1), bisect_right(starts, y2)):
+                # Next to the edge every tile is either outside or on the boundary
+                if not self._column_boundary(x + 1, max(starts[k], y1), min(ends[k], y2)):
+                    return False
+        return True
+
+
+class TileRaster:
+    """
+    The red/green region rasterized on coordinate-compressed tiles
+
+    Every distinct tile coordinate and every gap between consecutive coordinates gets its own
+    row/column, so a compressed cell stands for a block of tiles that are either all in the
+    region or all out of it. A 2-D prefix sum over the tiles outside the region answers
+    "is this rectangle fully inside" in O(1).
+    """
+    def __init__(self, data: list[Tile]):
+        self.xs = np.unique([t.x for t in data])
+        self.ys = np.unique([t.y for t in data])
+        rows, cols = 2 * len(self.ys) - 1, 2 * len(self.xs) - 1
+
+        # Compressed coordinates of each edge's end points
+        x1, y1 = self.index([t.x for t in data], [t.y for t in data])
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        vertical = x1 == x2
+        lo, hi = np.minimum(y1, y2), np.maximum(y1, y2)
+        left, right = np.minimum(x1, x2), np.maximum(x1, x2)
+
+        # Draw the edges with difference arrays
+        down = np.zeros((rows + 1, cols), dtype=np.int32)
+        np.add.at(down, (lo[vertical], x1[vertical]), 1)
+        np.add.at(down, (hi[vertical] + 1, x1[vertical]), -1)
+        across = np.zeros((rows, cols + 1), dtype=np.int32)
+        np.add.at(across, (y1[~vertical], left[~vertical]), 1)
+        np.add.at(across, (y1[~vertical], right[~vertical] + 1), -1)
+        boundary = (down.cumsum(axis=0)[:-1] > 0) | (across.cumsum(axis=1)[:, :-1] > 0)
+
+        # Scanline fill: a ray cast left just above each tile crosses the vertical edges
+        # whose span covers [y, y + 1)
+        crossings = np.zeros((rows + 1, cols), dtype=np.int32)
+        np.add.at(crossings, (lo[vertical], x1[vertical]), 1)
+        np.add.at(crossings, (hi[vertical], x1[vertical]), -1)
+        crossings = crossings.cumsum(axis=0)[:-1]
+        interior = (crossings.cumsum(axis=1) - crossings) % 2 == 1
+
+        # Gaps between adjacent coordinates hold no tiles
+        has_x = np.ones(cols, dtype=bool)
+        has_x[1::2] = np.diff(self.xs) > 1
+        has_y = np.ones(rows, dtype=bool)
+        has_y[1::2] = np.diff(self.ys) > 1
+        outside = ~(boundary | interior) & has_y[:, None] & has_x[None, :]
+
+        self.holes = np.zeros((rows + 1, cols + 1), dtype=np.int64)
+        self.holes[1:, 1:] = outside.cumsum(axis=0).cumsum(axis=1)
+
+    def index(self, x, y) -> tuple[np.ndarray, np.ndarray]:
+        """Compressed column and row of tile coordinates"""
+        return 2 * np.searchsorted(self.xs, x), 2 * np.searchsorted(self.ys, y)
+
+    def contains(self, x1, y1, x2, y2) -> np.ndarray:
+        """True for each rectangle, given by opposite corner tiles, lying entirely in the region"""
+        c1, r1 = self.index(np.minimum(x1, x2), np.minimum(y1, y2))
+        c2, r2 = self.index(np.maximum(x1, x2), np.maximum(y1, y2))
+        holes = self.holes[r2 + 1, c2 + 1] - self.holes[r1, c2 + 1] - self.holes[r2 + 1, c1] + self.holes[r1, c1]
+        return holes == 0
 
 
 def parse(path: Path):
@@ -57,34 +245,123 @@ def parse(path: Path):
     return [Tile(*map(int, line.split(","))) for line in path.read_text().strip().splitlines()]
 
 
-def solution_generator(data: list[Tile]):
-    """Generate solutions so that the heap can be used for both parts"""
-    heap: list[tuple[float, tuple[Tile, Tile]]] = []
-    for i, t1 in enumerate(data[:-1]):
-        for t2 in data[i+1:]:
-            # Use negative of area since we want to maximise this
-            heapq.heappush(heap, (-(t1*t2), (t1,t2)))
-    
-    # Max will be the first on the heap
-    yield -heap[0][0]
-
-    edges = [Edge(t1,t2) for t1, t2 in zip(data, data[1:]+[data[0]])]
-    vertical_edges = [e for e in edges if e.vertical()]
-
-    def inside(t1: Tile):
-        """Use ray casting to determine if a point is inside the polygon"""
-        return sum(e.ray_cast(t1) for e in vertical_edges) % 2
-
-    def intersect(t1: Tile, t2: Tile):
-        """returns True if none of the edges intersects with the rectangle formed with t1 and t2"""
-        return not any(e.intersect(t1, t2) for e in edges)
-
-    # The heap is already ordered by rectangle size, we just need to 
-    # check the rectangles are valid
-    while heap:
-        neg_area, (t1,t2) = heapq.heappop(heap)
-        if intersect(t1, t2) and inside(t1):
-            yield -neg_area
+def pareto_front(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Indices of the tiles not beaten by any other tile on both a smaller x and a smaller y"""
+    order = np.lexsort((ys, xs))
+    sorted_ys = ys[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = sorted_ys[1:] < np.minimum.accumulate(sorted_ys)[:-1]
+    return order[keep]
+
+
+def max_area(xs: np.ndarray, ys: np.ndarray, block: int = BLOCK) -> int:
+    """
+    The largest rectangle with red tiles at opposite corners
+
+    The best rectangle stretches from a bottom-left corner to a top-right one, or from a
+    top-left corner to a bottom-right one, and moving either corner further out only helps.
+    So only the pairs across opposite Pareto fronts need scoring.
+    """
+    best = 0
+    for lower, upper in [
+        (pareto_front(xs, ys), pareto_front(-xs, -ys)),
+        (pareto_front(xs, -ys), pareto_front(-xs, ys)),
+    ]:
+        for start in range(0, len(lower), block):
+            i = lower[start:start+block, None]
+            areas = (np.abs(xs[i] - xs[upper]) + 1) * (np.abs(ys[i] - ys[upper]) + 1)
+            best = max(best, int(areas.max()))
+    return best
+
+
+def ranked_pairs(xs: np.ndarray, ys: np.ndarray) -> Iterator[tuple[int, int, int]]:
+    """
+    Lazily yield (area, i, j) for every pair of corners i < j from largest to smallest area
+
+    A heap holds the best remaining pair of each row, and a row is only sorted in full
+    the first time it reaches the top.
+    """
+    n = len(xs)
+
+    def row_areas(i: int) -> np.ndarray:
+        return (np.abs(xs[i] - xs[i+1:]) + 1) * (np.abs(ys[i] - ys[i+1:]) + 1)
+
+    # Seed the heap with the best pair of every row
+    with instrument.phase("day09.heap_seed"):
+        heap = [(-int(row_areas(i).max()), i, -1) for i in range(n - 1)]
+        heapq.heapify(heap)
+
+    rows: dict[int, np.ndarray] = {}
+    pops = 0
+    try:
+        while heap:
+            _, i, k = heapq.heappop(heap)
+            pops += 1
+            if k < 0:
+                # First visit to row i: sort its pairs by decreasing area
+                areas = row_areas(i)
+                order = np.argsort(-areas, kind="stable")
+                rows[i] = np.stack([areas[order], order + i + 1], axis=1)
+                k = 0
+            area, j = rows[i][k].tolist()
+            yield area, i, j
+            if k + 1 < len(rows[i]):
+                heapq.heappush(heap, (-int(rows[i][k+1, 0]), i, k + 1))
+            else:
+                del rows[i]
+    finally:
+        # Reported however far the caller got
+        if instrument.ENABLED:
+            instrument.count("day09.heap_pops", pops)
+            instrument.count("day09.rows_sorted", n - 1 - sum(1 for _, _, k in heap if k < 0))
+
+
+def solution_generator(data: list[Tile], block: int = BLOCK):
+    """Generate solutions, scanning every pair of red tiles as opposite corners"""
+    xs = np.array([t.x for t in data], dtype=np.int64)
+    ys = np.array([t.y for t in data], dtype=np.int64)
+
+    def corner_pairs():
+        """(i, j, area) for blocks of pairs with i < j"""
+        for start in range(0, len(data), block):
+            i, j = np.nonzero(np.triu(np.ones((min(block, len(data) - start), len(data)), dtype=bool), k=start + 1))
+            i += start
+            yield i, j, (np.abs(xs[i] - xs[j]) + 1) * (np.abs(ys[i] - ys[j]) + 1)
+
+    # Max over all pairs of corners
+    with instrument.phase("day09.max_area"):
+        best = max_area(xs, ys, block)
+    yield best
+
+    cells = (2 * len(np.unique(xs)) - 1) * (2 * len(np.unique(ys)) - 1)
+    if cells > RASTER_CELLS:
+        # Too many distinct coordinates to rasterize, so check the largest candidates
+        # one at a time against the edge index instead
+        with instrument.phase("day09.polygon_index"):
+            index = PolygonIndex(data)
+        rejected = 0
+        for area, i, j in ranked_pairs(xs, ys):
+            if index.contains(data[i], data[j]):
+                if instrument.ENABLED:
+                    instrument.count("day09.rejected", rejected)
+                    rejected = 0
+                yield area
+            else:
+                rejected += 1
+        if instrument.ENABLED:
+            instrument.count("day09.rejected", rejected)
+        return
+
+    # Keep the rectangles that lie entirely in the region, largest first
+    with instrument.phase("day09.raster"):
+        raster = TileRaster(data)
+        valid = np.concatenate([
+            areas[raster.contains(xs[i], ys[i], xs[j], ys[j])] for i, j, areas in corner_pairs()
+        ])
+    if instrument.ENABLED:
+        instrument.count("day09.candidates", len(xs) * (len(xs) - 1) // 2)
+        instrument.count("day09.rejected", len(xs) * (len(xs) - 1) // 2 - len(valid))
+    yield from (int(area) for area in -np.sort(-valid))
 
 
 def main():
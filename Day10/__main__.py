@@ -1,14 +1,376 @@
 """AoC :: Day 10"""
 from dataclasses import dataclass
+import functools
+import math
+import operator
 from pathlib import Path
 import re
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Literal
 
-from ortools.linear_solver import pywraplp
+import numpy as np
+
+from aoc import instrument
+
+if TYPE_CHECKING:
+    from ortools.linear_solver import pywraplp
 
 # Constants
 input_path = Path(__file__).parent / 'Day10.in'
 
 
+def gf2_solve(vectors: list[int], target: int) -> tuple[int, list[int]] | None:
+    """
+    Solve sum(x_j * vectors[j]) = target over GF(2) by Gaussian elimination
+
+    Returns a particular solution and a basis of the null space, both as bitmasks over
+    the vectors, or None if there is no solution.
+    """
+    # Reduced vectors keyed by their leading bit, with the combination of inputs making each
+    basis: dict[int, tuple[int, int]] = {}
+    kernel: list[int] = []
+    for j, v in enumerate(vectors):
+        combo = 1 << j
+        while v:
+            pivot = v.bit_length() - 1
+            if pivot not in basis:
+                basis[pivot] = (v, combo)
+                break
+            b, c = basis[pivot]
+            v, combo = v ^ b, combo ^ c
+        else:
+            kernel.append(combo)
+
+    particular = 0
+    while target:
+        pivot = target.bit_length() - 1
+        if pivot not in basis:
+            return None
+        b, c = basis[pivot]
+        target, particular = target ^ b, particular ^ c
+    return particular, kernel
+
+
+def _min_weight_gray(particular: int, kernel: list[int]) -> int:
+    """Minimum popcount over particular + span(kernel), visiting every combination in Gray code order"""
+    best = current = particular
+    instrument.count("day10.gray_combinations", 1 << len(kernel))
+    for i in range(1, 1 << len(kernel)):
+        # Consecutive Gray codes differ in the lowest set bit of i
+        current ^= kernel[(i & -i).bit_length() - 1]
+        if current.bit_count() < best.bit_count():
+            best = current
+    return best.bit_count()
+
+
+def _min_weight_mitm(particular: int, kernel: list[int]) -> int:
+    """
+    Minimum popcount over particular + span(kernel), meeting in the middle
+
+    Every kernel vector is one free button plus some pivot buttons, so a combination weighs
+    the number of free buttons used plus the popcount of its pivot part. That is a shortest
+    path from the particular solution's pivot part to zero, stepping by a kernel vector's
+    pivot part or by a single pivot button, which is searched breadth first from both ends
+    at once over at most 2**rank states.
+    """
+    # Buttons only join the kernel after every button they depend on, so the free button
+    # of each kernel vector is its highest bit
+    free = 0
+    for k in kernel:
+        free |= 1 << (k.bit_length() - 1)
+    pivots = (particular | functools.reduce(operator.or_, kernel, 0)) & ~free
+    steps = {k & ~free for k in kernel} | {1 << b for b in range(pivots.bit_length()) if pivots >> b & 1}
+    steps.discard(0)
+
+    start = particular & ~free
+    if not start:
+        return 0
+    # Distances from each end and the frontier of each search
+    seen = [{start: 0}, {0: 0}]
+    frontiers = [[start], [0]]
+    while all(frontiers):
+        # Grow the smaller search by a whole layer
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        here, there = seen[side], seen[1 - side]
+        frontier = []
+        for state in frontiers[side]:
+            for step in steps:
+                if (nxt := state ^ step) not in here:
+                    here[nxt] = here[state] + 1
+                    frontier.append(nxt)
+        instrument.observe("day10.frontier", len(frontier))
+        meets = [here[state] + there[state] for state in frontier if state in there]
+        if meets:
+            if instrument.ENABLED:
+                instrument.count("day10.states_seen", len(here) + len(there))
+            return min(meets)
+        frontiers[side] = frontier
+    raise ValueError("kernel search never met")
+
+
+def min_weight_solution(vectors: list[int], target: int) -> int | None:
+    """Fewest vectors XORing to target, or None if target is out of reach"""
+    solution = gf2_solve(vectors, target)
+    if solution is None:
+        return None
+    particular, kernel = solution
+    rank = len(vectors) - len(kernel)
+    # Gray code visits 2**k combinations, the search in the middle at most 2**rank states
+    if len(kernel) <= rank + (len(vectors) + rank).bit_length():
+        return _min_weight_gray(particular, kernel)
+    return _min_weight_mitm(particular, kernel)
+
+
+def integer_solutions(columns: list[list[int]], target: list[int]) -> tuple[list[int], list[list[int]]] | None:
+    """
+    Every integer x with sum(x[j] * columns[j]) = target, as particular + sum(t[k] * kernel[k]) for integer t
+
+    Reduces the columns, each tagged with its own unit vector, to echelon form with integer
+    row operations that can be undone (swaps and adding whole multiples of one row to another).
+    The tags of the rows that reduce to zero then span the integer kernel, and the pivot rows
+    give the particular solution by back substitution. Returns None if there is no integer x.
+    """
+    m, n = len(target), len(columns)
+    rows = [columns[j][:] + [int(i == j) for i in range(n)] for j in range(n)]
+    rank = 0
+    for col in range(m):
+        # Euclid's algorithm down the column, until one row holds its gcd and the rest are 0
+        while nonzero := [i for i in range(rank, n) if rows[i][col]]:
+            r = min(nonzero, key=lambda i: abs(rows[i][col]))
+            rows[rank], rows[r] = rows[r], rows[rank]
+            pivot = rows[rank]
+            for i in range(rank + 1, n):
+                if q := rows[i][col] // pivot[col]:
+                    rows[i] = [a - q * b for a, b in zip(rows[i], pivot)]
+            if len(nonzero) == 1:
+                rank += 1
+                break
+
+    residual, particular = target[:], [0] * n
+    for row in rows[:rank]:
+        col = next(c for c in range(m) if row[c])
+        z, r = divmod(residual[col], row[col])
+        if r:
+            return None
+        residual = [a - z * b for a, b in zip(residual, row[:m])]
+        particular = [a + z * b for a, b in zip(particular, row[m:])]
+    if any(residual):
+        return None
+    return particular, [row[m:] for row in rows[rank:]]
+
+
+def lll_reduce(basis: list[list[int]], delta: float = 0.75) -> list[list[int]]:
+    """
+    A Lenstra-Lenstra-Lovasz reduced basis of the lattice spanned by the given one
+
+    The basis only ever changes by integer row operations, so floating point Gram-Schmidt
+    can only make the reduction less thorough, never the lattice different.
+    """
+    basis = [v[:] for v in basis]
+    k = len(basis)
+
+    def gram_schmidt() -> tuple[np.ndarray, np.ndarray]:
+        """Squared lengths of the orthogonalised vectors and the coefficients onto them"""
+        B = np.array(basis, dtype=float)
+        ortho, mu = B.copy(), np.eye(k)
+        for i in range(k):
+            for j in range(i):
+                mu[i, j] = B[i] @ ortho[j] / (ortho[j] @ ortho[j])
+                ortho[i] -= mu[i, j] * ortho[j]
+        return (ortho * ortho).sum(axis=1), mu
+
+    norms, mu = gram_schmidt()
+    i = 1
+    while i < k:
+        # Size reduce against every earlier vector, which leaves the orthogonalisation alone
+        for j in range(i - 1, -1, -1):
+            if q := round(mu[i, j]):
+                basis[i] = [a - q * b for a, b in zip(basis[i], basis[j])]
+                mu[i, :j + 1] -= q * mu[j, :j + 1]
+        if norms[i] >= (delta - mu[i, i - 1] ** 2) * norms[i - 1]:
+            i += 1
+        else:
+            basis[i], basis[i - 1] = basis[i - 1], basis[i]
+            norms, mu = gram_schmidt()
+            i = max(i - 1, 1)
+    return basis
+
+
+def _simplex(cost: np.ndarray, G: np.ndarray, h: np.ndarray, eps: float = 1e-9) -> tuple[float, np.ndarray] | None:
+    """
+    Minimise cost . y subject to G y <= h and y >= 0 with a dense two phase simplex
+
+    Uses Bland's rule so it never cycles. Returns the optimum and its y, or None if infeasible.
+    """
+    rows, k = G.shape
+    negative = np.flatnonzero(h < 0)
+    cols = k + rows + len(negative)
+    # Tableau of [G | slacks | artificials | h], with rows flipped where h < 0
+    T = np.zeros((rows, cols + 1))
+    T[:, :k], T[:, -1] = G, h
+    T[np.arange(rows), k + np.arange(rows)] = 1
+    T[negative] *= -1
+    T[negative, k + rows + np.arange(len(negative))] = 1
+    basis = k + np.arange(rows)
+    basis[negative] = k + rows + np.arange(len(negative))
+
+    def pivot_loop(z: np.ndarray, allowed: int) -> bool:
+        """Pivot until no reduced cost in the first `allowed` columns is negative, False if unbounded"""
+        while True:
+            entering = np.flatnonzero(z[:allowed] < -eps)
+            if not len(entering):
+                return True
+            j = entering[0]
+            column = T[:, j]
+            candidates = np.flatnonzero(column > eps)
+            if not len(candidates):
+                return False
+            ratios = T[candidates, -1] / column[candidates]
+            ties = candidates[ratios <= ratios.min() + eps]
+            r = ties[np.argmin(basis[ties])]
+            T[r] /= T[r, j]
+            for i in range(rows):
+                if i != r and T[i, j]:
+                    T[i] -= T[i, j] * T[r]
+            z -= z[j] * T[r]
+            basis[r] = j
+
+    if len(negative):
+        # Phase one: drive the artificial variables to zero
+        z = np.zeros(cols + 1)
+        z[k + rows:cols] = 1
+        z -= T[negative].sum(axis=0)
+        pivot_loop(z, cols)
+        if -z[-1] > 1e-7:
+            return None
+        # Swap any artificial still in the basis (at zero) for a real column
+        for r in np.flatnonzero(basis >= k + rows):
+            j = np.flatnonzero(np.abs(T[r, :k + rows]) > eps)
+            if len(j):
+                T[r] /= T[r, j[0]]
+                for i in range(rows):
+                    if i != r and T[i, j[0]]:
+                        T[i] -= T[i, j[0]] * T[r]
+                basis[r] = j[0]
+
+    # Phase two on the real objective
+    z = np.zeros(cols + 1)
+    z[:k] = cost
+    for r, j in enumerate(basis):
+        if j < k and cost[j]:
+            z -= cost[j] * T[r]
+    if not pivot_loop(z, k + rows):
+        raise ValueError("linear relaxation is unbounded")
+    y = np.zeros(cols)
+    y[basis] = T[:, -1]
+    return -z[-1], y[:k]
+
+
+def branch_and_bound(
+    coefficients: list[list[int]], target: list[int], eps: float = 1e-6, time_limit: float | None = None
+) -> int | None:
+    """
+    Minimise sum(x) subject to A x = target with x >= 0 integer, where A[i][j] = coefficients[j][i]
+
+    The integer solutions of A x = target are particular + K t for integer t, where the
+    columns of K are an LLL reduced basis of the integer kernel. So the search is over t,
+    where there is nothing left to divide, and rounding any t gives an integer x to try as
+    the incumbent. Each node solves the linear relaxation over a box of t, prunes on its
+    optimum, and splits the range of the most fractional t. If a time limit in seconds is
+    given and the search outlasts it, a TimeoutError is raised.
+    """
+    m, n = len(target), len(coefficients)
+    solution = integer_solutions(coefficients, target)
+    if solution is None:
+        return None
+    particular, kernel = solution
+    if not kernel:
+        return sum(particular) if all(v >= 0 for v in particular) else None
+    kernel = lll_reduce(kernel)
+    k = len(kernel)
+
+    x0 = np.array(particular, dtype=float)
+    K = np.array(kernel, dtype=float).T
+    # sum(x) = sum(x0) + weight . t
+    weight = K.sum(axis=0)
+    # Every variable is bounded by the smallest target it contributes to (A is non-negative),
+    # which bounds t = pinv(K) (x - x0) in turn
+    upper = np.array([min((target[i] for i in range(m) if coefficients[j][i]), default=0) for j in range(n)])
+    P = np.linalg.pinv(K)
+    shift = P @ x0
+    lowest = [math.floor(v - eps) for v in (np.minimum(P, 0) * upper).sum(axis=1) - shift]
+    highest = [math.ceil(v + eps) for v in (np.maximum(P, 0) * upper).sum(axis=1) - shift]
+
+    best: int | None = None
+    nodes = 0
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+
+    def point(t: list[int]) -> list[int]:
+        """The x of an integer t, in exact arithmetic"""
+        return [p + sum(tk * v[j] for tk, v in zip(t, kernel)) for j, p in enumerate(particular)]
+
+    def search(lo: list[int], hi: list[int]):
+        nonlocal best, nodes
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"branch and bound ran out of time after {time_limit}s")
+        nodes += 1
+        lo_t, hi_t = np.array(lo, dtype=float), np.array(hi, dtype=float)
+        # Shift t to start at zero, then keep x non-negative and t under its upper bounds
+        base = x0 + K @ lo_t
+        relaxation = _simplex(weight, np.vstack([-K, np.eye(k)]), np.concatenate([base, hi_t - lo_t]))
+        if relaxation is None:
+            return
+        value, y = relaxation
+        bound = math.ceil(base.sum() + value - eps)
+        if best is not None and bound >= best:
+            return
+
+        t = lo_t + y
+        x = point([min(max(round(v), l), u) for v, l, u in zip(t, lo, hi)])
+        if min(x) >= 0 and (best is None or sum(x) < best):
+            best = sum(x)
+            if bound >= best:
+                return
+
+        frac = np.abs(t - np.round(t))
+        unfixed = np.array(lo) < np.array(hi)
+        choices = np.flatnonzero((frac > eps) & unfixed)
+        if not len(choices):
+            # A whole t is solved by its rounding unless that came out negative, in which
+            # case it was only whole up to eps and still needs splitting
+            if min(x) >= 0:
+                return
+            choices = np.flatnonzero(unfixed)
+            if not len(choices):
+                return
+        j = int(choices[np.argmax(frac[choices])])
+        split = min(max(math.floor(t[j]), lo[j]), hi[j] - 1)
+        branches = [(lo, hi[:j] + [split] + hi[j+1:]), (lo[:j] + [split + 1] + lo[j+1:], hi)]
+        # Try the nearer side first
+        if t[j] - split > 0.5:
+            branches.reverse()
+        for child_lo, child_hi in branches:
+            search(child_lo, child_hi)
+
+    try:
+        search(lowest, highest)
+    finally:
+        # Reported even if the search ran out of time
+        if instrument.ENABLED:
+            instrument.count("day10.bnb_nodes", nodes)
+    return best
+
+
+def create_solver() -> "pywraplp.Solver":
+    """Create the mip solver with the CP-SAT backend"""
+    # ortools is only needed for this backend, so it is imported on first use
+    from ortools.linear_solver import pywraplp
+    solver: pywraplp.Solver = pywraplp.Solver.CreateSolver("SAT")
+    if not solver:
+        raise Exception("solver not initialised")
+    return solver
+
+
 @dataclass
 class Lights:
     """An array of indicator lights represented as a binary integer"""
@@ -56,25 +418,44 @@ class Lights:
 
     def solve_lights(self):
         """Find the least number of button presses to get from the initial state to the goal"""
-        # init
-        steps = 0
-        visited = {self.state}
-        cursors = {self.state}
+        # Pressing a button twice undoes it, so this is the smallest set of buttons XORing to
+        # the difference between the state and the goal
+        with instrument.phase("day10.solve_lights"):
+            steps = min_weight_solution(self.buttons, self.state ^ self.goal)
+        if steps is None:
+            raise ValueError(f"goal {self.goal:b} cannot be reached")
+        return steps
 
-        while self.goal not in cursors:
-            cursors = {cursor^button for cursor in cursors for button in self.buttons}
-            cursors -= visited
-            visited |= cursors
-            steps += 1
+    def solve_joltage(
+        self,
+        solver: "pywraplp.Solver | None" = None,
+        time_limit: float | None = None,
+        backend: Literal["native", "cp-sat"] = "native",
+    ) -> int:
+        """
+        Meet the joltage requirements with the least number of button presses
 
-        return steps
+        The native backend is an exact branch and bound that needs no ortools. With the
+        CP-SAT backend a warm solver can be passed in to be cleared and reused. With either,
+        if a time limit in seconds is given and it runs out, a TimeoutError is raised.
+        Any other way the solver stops short of an optimum raises rather than returning.
+        """
+        if backend == "native":
+            with instrument.phase("day10.branch_and_bound"):
+                presses = branch_and_bound(self._create_coefficient_matrix(), self.joltage, time_limit=time_limit)
+            if presses is None:
+                raise ValueError(f"joltage {self.joltage} cannot be reached")
+            return presses
+        if backend != "cp-sat":
+            raise ValueError(f"backend should be one of 'native' or 'cp-sat', got {backend}")
 
-    def solve_joltage(self) -> int:
-        """Meet the joltage requirements with the least number of button presses"""
-        # Create the mip solver with the CP-SAT backend.
-        solver: pywraplp.Solver = pywraplp.Solver.CreateSolver("SAT")
-        if not solver:
-            raise Exception("solver not initialised")
+        from ortools.linear_solver import pywraplp
+        if solver is None:
+            solver = create_solver()
+        else:
+            solver.Clear()
+        # Clear keeps the parameters, so always set the limit, where 0 means none
+        solver.SetTimeLimit(0 if time_limit is None else max(1, int(1000 * time_limit)))
 
         # Create the data model
         m, n = len(self.joltage), len(self.buttons)
@@ -100,8 +481,14 @@ class Lights:
         objective.SetMinimization()
 
         # Solve the system
-        solver.Solve()
-        return int(objective.Value())
+        status = solver.Solve()
+        if status == pywraplp.Solver.OPTIMAL:
+            return round(objective.Value())
+        if status == pywraplp.Solver.INFEASIBLE:
+            raise ValueError(f"joltage {self.joltage} cannot be reached")
+        if time_limit is not None and status in (pywraplp.Solver.FEASIBLE, pywraplp.Solver.NOT_SOLVED):
+            raise TimeoutError(f"no optimal button presses found within {time_limit}s")
+        raise RuntimeError(f"solver stopped without an optimal solution, status {status}")
 
     def _create_coefficient_matrix(self):
         """Stores the data for the problem."""
@@ -127,15 +514,69 @@ def part_two(data: list[Lights]):
     return sum(lights.solve_joltage() for lights in data)
 
 
+# One warm solver per worker process, when using CP-SAT
+_worker_solver: "pywraplp.Solver | None" = None
+
+
+def _init_worker(backend: str):
+    """Create the worker's solver once, up front"""
+    global _worker_solver
+    if backend == "cp-sat":
+        _worker_solver = create_solver()
+
+
+def _solve_machine(line: str, time_limit: float | None, backend: str) -> tuple[int, int | None]:
+    """Parse a machine once and solve both parts for it, with None for a joltage that timed out"""
+    lights = Lights.parse(line)
+    try:
+        joltage = lights.solve_joltage(_worker_solver, time_limit, backend)
+    except TimeoutError:
+        joltage = None
+    return lights.solve_lights(), joltage
+
+
+def solve_batch(
+    lines: Iterable[str],
+    max_workers: int | None = None,
+    time_limit: float | None = None,
+    progress: Callable[[int, int], None] | None = None,
+    backend: Literal["native", "cp-sat"] = "native",
+) -> Iterator[tuple[int, int | None]]:
+    """
+    Solve both parts for every machine across a pool of worker processes
+
+    Yields (lights, joltage) per machine in input order, each as soon as it and every
+    machine before it are done. `progress(done, total)` is called as each machine finishes.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(backend,)) as pool:
+        futures = {pool.submit(_solve_machine, line, time_limit, backend): i for i, line in enumerate(lines)}
+        finished: dict[int, tuple[int, int | None]] = {}
+        next_index = 0
+        for done, future in enumerate(as_completed(futures), 1):
+            finished[futures[future]] = future.result()
+            if progress is not None:
+                progress(done, len(futures))
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+
+
 def main():
     """Run the solutions and print the results"""
     print(__doc__)
-    # Parse inputs
-    data = parse(input_path)
+    # Solve both parts for each machine in parallel
+    lines = input_path.read_text().strip().splitlines()
+    lights, joltage = zip(*solve_batch(lines)) if lines else ((), ())
     # Part 1
-    print(f"Part 1: {part_one(data)}")
-    # Part 2
-    print(f"Part 2: {part_two(data)}")
+    print(f"Part 1: {sum(lights)}")
+    # Part 2, leaving out any machine whose joltage timed out
+    unsolved = [i for i, presses in enumerate(joltage) if presses is None]
+    total = sum(presses for presses in joltage if presses is not None)
+    if unsolved:
+        print(f"Part 2: {total} (partial, {len(unsolved)} timed out: machines {', '.join(map(str, unsolved))})")
+    else:
+        print(f"Part 2: {total}")
 
 
 if __name__ == '__main__':
@@ -1,13 +1,41 @@
 """AoC :: Day 11"""
+from dataclasses import dataclass, field
+import hashlib
+import json
 from math import prod
-import networkx as nx
+import os
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Self
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import networkx as nx
 
 # Constants
 input_path = Path(__file__).parent / 'Day11.in'
+# Hub tables are cached here, one file per input
+cache_dir = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "aoc"
+# Nodes the puzzle asks about, tabulated by default
+HUBS = ("you", "svr", "dac", "fft", "out")
+INT64_MAX = np.iinfo(np.int64).max
+
+def adjacency(path: Path) -> dict[str, list[str]]:
+    """Each device's outputs, with devices in order of first mention"""
+    graph: dict[str, list[str]] = {}
+    for line in path.read_text().strip().splitlines():
+        name, raw_outputs = line.split(": ")
+        outputs = [output.strip() for output in raw_outputs.split(" ") if output]
+        graph.setdefault(name, [])
+        for output in outputs:
+            graph[name].append(output)
+            graph.setdefault(output, [])
+    return graph
 
-def parse(path: Path) -> nx.DiGraph:
+
+def parse(path: Path) -> "nx.DiGraph":
     """Parse the plaintext input"""
+    import networkx as nx
     G = nx.DiGraph()
     for line in path.read_text().strip().splitlines():
         name, raw_outputs = line.split(": ")
@@ -17,38 +45,237 @@ def parse(path: Path) -> nx.DiGraph:
     return G
 
 
-def part_one(graph: nx.DiGraph, start: str = "you", stop: str = "out"):
+def _out_edges(indptr: np.ndarray, nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Positions in the CSR indices of every out edge of `nodes`, and the node each one leaves"""
+    starts = indptr[nodes]
+    degrees = indptr[nodes + 1] - starts
+    total = int(degrees.sum())
+    # Offset a single arange so that each node's run begins at its indptr entry
+    shift = np.repeat(starts - (np.cumsum(degrees) - degrees), degrees)
+    return np.arange(total) + shift, np.repeat(nodes, degrees)
+
+
+@dataclass
+class DeviceGraph:
+    """
+    A device DAG compiled to integer ids and CSR adjacency
+
+    `order` is a topological order grouped into levels, where `level_offsets` marks the
+    start of each level in `order` and every edge goes from a lower level to a higher one.
+    """
+    names: list[str]
+    ids: dict[str, int]
+    indptr: np.ndarray
+    indices: np.ndarray
+    order: np.ndarray
+    level_offsets: np.ndarray
+    level: np.ndarray
+
+    @classmethod
+    def parse(cls, path: Path) -> Self:
+        """Compile straight from the plaintext input, without building a networkx graph"""
+        return cls.from_adjacency(adjacency(path))
+
+    @classmethod
+    def compile(cls, graph: "nx.DiGraph") -> Self:
+        """Compile a networkx graph"""
+        return cls.from_adjacency({name: list(graph.successors(name)) for name in graph.nodes})
+
+    @classmethod
+    def from_adjacency(cls, graph: dict[str, list[str]]) -> Self:
+        """Number the nodes, build the CSR adjacency and sort it topologically once"""
+        names = list(graph)
+        ids = {name: i for i, name in enumerate(names)}
+        n = len(names)
+        degrees = np.fromiter((len(graph[name]) for name in names), dtype=np.int64, count=n)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+        indices = np.fromiter(
+            (ids[j] for name in names for j in graph[name]), dtype=np.int64, count=int(indptr[-1])
+        )
+
+        # Kahn's algorithm, one whole level of sources at a time
+        in_degree = np.bincount(indices, minlength=n)
+        level = np.full(n, -1, dtype=np.int64)
+        frontier = np.flatnonzero(in_degree == 0)
+        levels = []
+        while len(frontier):
+            level[frontier] = len(levels)
+            levels.append(frontier)
+            edges, _ = _out_edges(indptr, frontier)
+            targets = indices[edges]
+            np.subtract.at(in_degree, targets, 1)
+            frontier = np.unique(targets[in_degree[targets] == 0])
+        if (level < 0).any():
+            raise ValueError("device graph contains a cycle")
+
+        order = np.concatenate(levels) if levels else np.zeros(0, dtype=np.int64)
+        level_offsets = np.cumsum([0] + [len(nodes) for nodes in levels])
+        return cls(names, ids, indptr, indices, order, level_offsets, level)
+
+    def path_counts(self, source: str, stop: str | None = None) -> np.ndarray:
+        """
+        Count the paths from `source` to every node with one sweep down the levels
+
+        Counts are int64 until they could overflow, then Python ints. Only levels up to
+        that of `stop` are swept, so counts for deeper nodes are left incomplete.
+        """
+        counts = np.zeros(len(self.names), dtype=np.int64)
+        first = self.level[self.ids[source]]
+        last = len(self.level_offsets) - 2 if stop is None else self.level[self.ids[stop]]
+        counts[self.ids[source]] = 1
+        peak = 1
+        for lvl in range(first, last):
+            nodes = self.order[self.level_offsets[lvl]:self.level_offsets[lvl + 1]]
+            nodes = nodes[counts[nodes] != 0]
+            if not len(nodes):
+                continue
+            edges, sources = _out_edges(self.indptr, nodes)
+            if not len(edges):
+                continue
+            targets = self.indices[edges]
+            # No target can gain more than its in-edges from this level times the largest count
+            if counts.dtype != object:
+                gain = int(counts[nodes].max()) * int(np.unique(targets, return_counts=True)[1].max())
+                if peak + gain > INT64_MAX:
+                    counts = counts.astype(object)
+            np.add.at(counts, targets, counts[sources])
+            peak = max(peak, int(counts[targets].max()))
+        return counts
+
+    def count(self, start: str, stop: str) -> int:
+        """Number of paths from `start` to `stop`"""
+        if self.level[self.ids[stop]] <= self.level[self.ids[start]]:
+            return int(start == stop)
+        return int(self.path_counts(start, stop)[self.ids[stop]])
+
+    def segment_counts(self, waypoints: Iterable[str]) -> list[int]:
+        """Number of paths between each consecutive pair of waypoints, taken in topological order"""
+        ordered = sorted(set(waypoints), key=lambda name: self.level[self.ids[name]])
+        return [self.count(a, b) for a, b in zip(ordered[:-1], ordered[1:])]
+
+
+@dataclass
+class HubTable:
+    """
+    Path counts between every ordered pair of hub nodes of a device graph
+
+    `counts[i][j]` is the number of paths from `hubs[i]` to `hubs[j]`, and `levels` are
+    the hubs' topological levels so routes through them can be put in order. `missing`
+    lists hubs that were asked for but are not in the graph, and `digest` identifies the
+    input the table was built from. Queries that leave the hubs are answered from `graph`,
+    compiled from `source` on first use if need be.
+    """
+    hubs: list[str]
+    levels: list[int]
+    counts: list[list[int]]
+    digest: str = ""
+    missing: list[str] = field(default_factory=list)
+    source: Path | None = field(default=None, repr=False, compare=False)
+    graph: DeviceGraph | None = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.index = {hub: i for i, hub in enumerate(self.hubs)}
+
+    @classmethod
+    def build(cls, graph: DeviceGraph, hubs: Iterable[str] = HUBS, digest: str = "") -> Self:
+        """Sweep the graph once from each hub that is in it"""
+        wanted = list(dict.fromkeys(hubs))
+        present = [hub for hub in wanted if hub in graph.ids]
+        columns = [graph.ids[hub] for hub in present]
+        counts = [[int(c) for c in graph.path_counts(hub)[columns]] for hub in present]
+        missing = [hub for hub in wanted if hub not in graph.ids]
+        return cls(present, [int(graph.level[i]) for i in columns], counts, digest, missing, graph=graph)
+
+    @classmethod
+    def load(cls, path: Path) -> Self:
+        """Read a table saved with `save`"""
+        return cls(**json.loads(path.read_text()))
+
+    def save(self, path: Path):
+        """Write the table as JSON, which keeps counts of any size exact"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "hubs": self.hubs, "levels": self.levels, "counts": self.counts,
+            "digest": self.digest, "missing": self.missing,
+        }))
+
+    def covers(self, hubs: Iterable[str]) -> bool:
+        """Whether every one of `hubs` is either tabulated or known to be absent from the graph"""
+        return set(hubs) <= self.index.keys() | set(self.missing)
+
+    def _graph(self, names: Iterable[str]) -> DeviceGraph:
+        """The full graph, for queries about `names` that are not all hubs"""
+        if self.graph is None:
+            if self.source is None:
+                missing = sorted(set(names) - self.index.keys())
+                raise KeyError(f"not in the hub table: {', '.join(missing)}")
+            self.graph = DeviceGraph.parse(self.source)
+        return self.graph
+
+    def count(self, start: str, stop: str) -> int:
+        """Number of paths from `start` to `stop`, looked up if both are hubs"""
+        if start in self.index and stop in self.index:
+            return self.counts[self.index[start]][self.index[stop]]
+        return self._graph((start, stop)).count(start, stop)
+
+    def segment_counts(self, waypoints: Iterable[str]) -> list[int]:
+        """Number of paths between each consecutive pair of waypoints, taken in topological order"""
+        waypoints = set(waypoints)
+        if waypoints <= self.index.keys():
+            level = dict(zip(self.hubs, self.levels))
+        else:
+            graph = self._graph(waypoints)
+            level = {name: graph.level[graph.ids[name]] for name in waypoints}
+        ordered = sorted(waypoints, key=lambda name: level[name])
+        return [self.count(a, b) for a, b in zip(ordered[:-1], ordered[1:])]
+
+
+def hub_table(path: Path, hubs: Iterable[str] = HUBS, cache: Path | None = cache_dir) -> HubTable:
+    """
+    Load the hub table for an input from the cache directory, or build and cache it
+
+    Tables are cached one per input, under the SHA-256 of its bytes, so switching inputs
+    never invalidates another input's table. A cached table is reused if it covers every
+    requested hub, counting hubs it already found to be absent from the graph.
+    """
+    hubs = list(hubs)
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    cached = None if cache is None else cache / f"Day11-{digest}.hubs.json"
+    if cached is not None and cached.exists():
+        table = HubTable.load(cached)
+        if table.digest == digest and table.covers(hubs):
+            table.source = path
+            return table
+        # Keep the hubs already tabulated as well as the new ones
+        hubs = [*table.hubs, *hubs]
+    table = HubTable.build(DeviceGraph.parse(path), hubs, digest)
+    table.source = path
+    if cached is not None:
+        table.save(cached)
+    return table
+
+
+def part_one(graph: "nx.DiGraph | DeviceGraph | HubTable", start: str = "you", stop: str = "out"):
     """Solution to part one"""
-    # init counts
-    counts = {}
-    # iterate over topologically sorted graph
-    for n in nx.topological_sort(graph):
-        # Start node
-        if n == start:
-            counts[n] = 1
-        # Only starts propagating after start
-        if counts:
-            for j in graph.successors(n):
-                counts[j] = counts.get(j, 0) + counts.get(n, 0)
-        # Stop once we reach the target
-        if n == stop:
-            break
+    if not isinstance(graph, (DeviceGraph, HubTable)):
+        graph = DeviceGraph.compile(graph)
     # Return number of paths that reach the stop node
-    return counts[stop]
+    return graph.count(start, stop)
 
-def part_two(graph: nx.DiGraph, visits: set[str], start: str = "svr", stop: str = "out"):
+def part_two(graph: "nx.DiGraph | DeviceGraph | HubTable", visits: set[str], start: str = "svr", stop: str = "out"):
     """Solution to part two"""
-    # Find order which nodes will be visited
-    sorted_nodes = [n for n in nx.topological_sort(graph) if n in visits | {start, stop}]
+    if not isinstance(graph, (DeviceGraph, HubTable)):
+        graph = DeviceGraph.compile(graph)
     # Calculate product of paths between each consecutive pair of nodes
-    return prod(part_one(graph, n1, n2) for n1, n2 in zip(sorted_nodes[:-1], sorted_nodes[1:]))
+    return prod(graph.segment_counts(visits | {start, stop}))
 
 
 def main():
     """Run the solutions and print the results"""
     print(__doc__)
-    # Parse inputs
-    graph = parse(input_path)
+    # Load the path counts between the puzzle's nodes, building them on the first run
+    graph = hub_table(input_path)
     # Part 1
     print(f"Part 1: {part_one(graph)}")
     # Part 2
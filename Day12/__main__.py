@@ -2,14 +2,19 @@
 AoC :: Day 12
 
 After seeing that the maximum  present/grid ratio was < 0.75 for all feasible regions, I took a punt
-on part 1 being trivial after testing for feasibility.
+on part 1 being trivial after testing for feasibility. Part 1 now packs every region exactly.
 """
 from dataclasses import dataclass
 import numpy as np
 from pathlib import Path
+from typing import Iterator
+
+from aoc.grid import grid_from_string, symbol_mask
 
 # Constants
 input_path = Path(__file__).parent / 'Day12.in'
+# Most failed states remembered per packing search, to bound its memory
+FAILED_LIMIT = 1 << 20
 
 @dataclass
 class Placement:
@@ -37,31 +42,152 @@ class Region:
         """returns True if the total area can accommodate the total area of the shapes"""
         return float(np.dot(self.requirements, [shape.sum() for shape in shapes]) / (self.width * self.length))
 
+    def fits(self, shapes: list[np.ndarray]) -> bool:
+        """returns True if the shapes can actually be packed into the region"""
+        # Scanning along the shorter side keeps the frontier of the search narrow
+        shape = (max(self.width, self.length), min(self.width, self.length))
+        return Grid(shape, shapes, list(self.requirements)).solve()
+
+
+def orientations(shape: np.ndarray) -> list[np.ndarray]:
+    """Every distinct rotation and reflection of a shape, trimmed to its bounding box"""
+    unique: dict[tuple, np.ndarray] = {}
+    for k in range(4):
+        for oriented in (np.rot90(shape, k), np.fliplr(np.rot90(shape, k))):
+            rows, cols = np.flatnonzero(oriented.any(axis=1)), np.flatnonzero(oriented.any(axis=0))
+            trimmed = np.ascontiguousarray(oriented[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1])
+            unique.setdefault((trimmed.shape, trimmed.tobytes()), trimmed)
+    return list(unique.values())
+
 
 class Grid:
+    """
+    A region packed as a bitboard, with cell (r, c) at bit r * cols + c of a Python int
+
+    Cells may be left empty, as long as no more are left than the region's spare area.
+    """
     def __init__(self, shape: tuple[int, int], shapes: list[np.ndarray], requirements: list[int]):
         self.grid = np.zeros(shape).astype(bool)
+        self.rows, self.cols = shape
+        self.shapes = shapes
+        self.requirements = list(requirements)
         self.pieces = [shape for i, requirement in enumerate(requirements) for shape in [shapes[i],]*requirement]
         self.placements: list[Placement] = []
-    
-    def next_pos(self, j):
-        pass
-    
+        # Cells that can be left empty in a packing
+        self.slack = self.rows * self.cols - sum(int(shape.sum()) for shape in self.pieces)
+        # Every way to place each required shape so its first cell covers a given cell
+        self.masks = [
+            self._anchored_masks(shape) if requirement else [] for shape, requirement in zip(shapes, requirements)
+        ]
+
+    def _anchored_masks(self, shape: np.ndarray) -> list[list[tuple[int, np.ndarray, tuple[int, int]]]]:
+        """For each cell, the (mask, orientation, position) of every placement whose first cell is there"""
+        anchored: list[list[tuple[int, np.ndarray, tuple[int, int]]]] = [[] for _ in range(self.rows * self.cols)]
+        for oriented in orientations(shape):
+            height, width = oriented.shape
+            cells = np.argwhere(oriented)
+            # The first cell in row-major order is the one that covers the first empty cell
+            anchor_r, anchor_c = cells[0]
+            base = sum(1 << (int(r) * self.cols + int(c)) for r, c in cells)
+            for r0 in range(self.rows - height + 1):
+                for c0 in range(self.cols - width + 1):
+                    cell = (r0 + anchor_r) * self.cols + c0 + anchor_c
+                    anchored[cell].append((base << (r0 * self.cols + c0), oriented, (r0, c0)))
+        return anchored
+
+    def next_pos(self, board: int) -> int:
+        """Index of the first empty cell on the board, or -1 if it is full"""
+        empty = ~board & ((1 << (self.rows * self.cols)) - 1)
+        return (empty & -empty).bit_length() - 1
+
+    def _choices(self, board: int, remaining: list[int], skipped: int) -> Iterator[tuple[int, int, np.ndarray, tuple[int, int]] | None]:
+        """Ways to deal with the first empty cell: cover it with a remaining shape, or leave it empty"""
+        cell = self.next_pos(board)
+        if cell < 0:
+            return
+        # Shapes with the most copies left first
+        for i in sorted(range(len(remaining)), key=lambda i: -remaining[i]):
+            if remaining[i]:
+                for mask, oriented, position in self.masks[i][cell]:
+                    if not board & mask:
+                        yield i, mask, oriented, position
+        if skipped < self.slack:
+            yield None
+
     def solve(self):
         """
         returns true if a solution exists
-        
-        use dfs with backtracking to see if a solution exists
+
+        use dfs with backtracking to see if a solution exists, always covering the first
+        empty cell. Identical shapes are taken by count, so they are never permuted, and
+        states already known to fail are remembered.
         """
-        for piece in self.pieces:
-            pass
+        if self.slack < 0:
+            return False
+        remaining = self.requirements[:]
+        left = sum(remaining)
+        if not left:
+            return True
+
+        failed: set[tuple[int, tuple[int, ...]]] = set()
+        boards = [0]
+        path: list[tuple[int, int, np.ndarray, tuple[int, int]] | None] = []
+        stack = [self._choices(0, remaining, 0)]
+        skipped = 0
+        while stack:
+            choice = next(stack[-1], False)
+            if choice is False:
+                # Every way forward from this board failed, so undo the step onto it
+                state = (boards.pop(), tuple(remaining))
+                if len(failed) < FAILED_LIMIT:
+                    failed.add(state)
+                stack.pop()
+                if path:
+                    undone = path.pop()
+                    if undone is None:
+                        skipped -= 1
+                    else:
+                        remaining[undone[0]] += 1
+                        left += 1
+                continue
+
+            if choice is None:
+                # Leave the cell empty by marking it as covered
+                cell = self.next_pos(boards[-1])
+                board = boards[-1] | (1 << cell)
+                skipped += 1
+            else:
+                board = boards[-1] | choice[1]
+                remaining[choice[0]] -= 1
+                left -= 1
+            path.append(choice)
+
+            if not left:
+                for step in path:
+                    if step is not None:
+                        _, _, oriented, position = step
+                        self.placements.append(Placement(oriented, position))
+                        r0, c0 = position
+                        self.grid[r0:r0 + oriented.shape[0], c0:c0 + oriented.shape[1]] |= oriented
+                return True
+
+            if (board, tuple(remaining)) in failed:
+                # Undo straight away
+                path.pop()
+                if choice is None:
+                    skipped -= 1
+                else:
+                    remaining[choice[0]] += 1
+                    left += 1
+                continue
+            boards.append(board)
+            stack.append(self._choices(board, remaining, skipped))
+        return False
 
 
 def array_from_shape_string(s: str) -> np.ndarray:
     """Convert a shape string into a numpy array"""
-    return np.array([
-            [(True if char == "#" else False) for char in line] for line in s.strip().splitlines()
-    ])
+    return symbol_mask(grid_from_string(s.strip()), "#")
 
 def parse(path: Path):
     """Parse the plaintext input"""
@@ -75,9 +201,68 @@ def parse(path: Path):
     return shapes, list(map(Region.parse, raw_region.strip().splitlines()))
 
 
+# The shapes, set once per worker process
+_worker_shapes: list[np.ndarray] = []
+
+
+def _init_worker(shapes: list[np.ndarray]):
+    """Hand the shapes to the worker once, up front"""
+    global _worker_shapes
+    _worker_shapes = shapes
+
+
+def _fits(key: tuple[int, int, tuple[int, ...]]) -> bool:
+    """Pack one (width, length, requirements) region with the worker's shapes"""
+    return Region(*key).fits(_worker_shapes)
+
+
+def classify(shapes: list[np.ndarray], regions: list[Region], max_workers: int | None = None) -> np.ndarray:
+    """
+    Decide which regions the shapes can be packed into, cheapest test first
+
+    1. Reject every region whose area is smaller than the total area of its shapes
+    2. Accept every region with room for each shape's bounding box side by side
+    3. Pack what is left exactly across a pool of worker processes, solving each distinct
+       (width, length, requirements) once
+    """
+    if not regions:
+        return np.zeros(0, dtype=bool)
+    areas = np.array([shape.sum() for shape in shapes])
+    requirements = np.array([region.requirements for region in regions])
+    width = np.array([region.width for region in regions])
+    length = np.array([region.length for region in regions])
+
+    # Stage 1: area
+    possible = requirements @ areas <= width * length
+    # Stage 2: one bounding box per shape, fitted either way round
+    box_h, box_w = np.max([shape.shape for shape in shapes], axis=0)
+    boxes = np.maximum((width // box_w) * (length // box_h), (width // box_h) * (length // box_w))
+    fits = possible & (boxes >= requirements.sum(axis=1))
+
+    # Stage 3: exact packing, where a region and its transpose are the same problem
+    ambiguous: dict[tuple[int, int, tuple[int, ...]], list[int]] = {}
+    for i in np.flatnonzero(possible & ~fits):
+        region = regions[i]
+        key = (min(region.width, region.length), max(region.width, region.length), tuple(region.requirements))
+        ambiguous.setdefault(key, []).append(i)
+    if len(ambiguous) == 1:
+        # Not worth starting a pool for
+        _init_worker(shapes)
+        solved = [_fits(key) for key in ambiguous]
+    elif ambiguous:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(shapes,)) as pool:
+            solved = list(pool.map(_fits, ambiguous))
+    else:
+        solved = []
+    for indices, packed in zip(ambiguous.values(), solved):
+        fits[indices] = packed
+    return fits
+
+
 def part_one(shapes: list[np.ndarray], regions: list[Region]):
     """Solution to part one"""
-    return int(sum(region.feasible(shapes) for region in regions)), max([region.pct(shapes) for region in regions if region.feasible(shapes)])
+    return int(classify(shapes, regions).sum())
 
 
 def part_two():
@@ -0,0 +1 @@
+"""AoC :: shared tooling for the DayNN solutions"""
@@ -0,0 +1,54 @@
+"""AoC :: benchmark runner, e.g. python -m aoc 8 9 --repeat 10 --json bench.json"""
+import argparse
+import json
+import os
+from pathlib import Path
+import sys
+
+from aoc import instrument
+from aoc.bench import bench, format_table
+from aoc.imports import format_imports, import_times
+
+
+def main(argv: list[str] | None = None):
+    """Parse the command line, run the benchmarks and report them"""
+    parser = argparse.ArgumentParser(prog="python -m aoc", description="Time the parse and solve phases of each day")
+    parser.add_argument("days", nargs="*", type=int, help="days to run, all of them by default")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="timed runs per day")
+    parser.add_argument("-w", "--warmup", type=int, default=1, help="untimed runs before timing")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="days to run at once in separate processes")
+    parser.add_argument("--inputs", type=Path, help="directory of DayNN.in files to use instead of each day's own")
+    parser.add_argument("--imports", action="store_true", help="report each day's cold-start import time instead")
+    parser.add_argument(
+        "--instrument", type=Path, metavar="PATH",
+        help="record the solvers' counters and phase timers to PATH, as collapsed stacks if it ends in .folded else JSON",
+    )
+    parser.add_argument("--trace-memory", action="store_true", help="with --instrument, also record each phase's peak memory, which slows the timed runs")
+    parser.add_argument("--json", type=Path, help="also write the results as JSON here, or - for stdout")
+    args = parser.parse_args(argv)
+
+    if args.instrument is not None:
+        # Through the environment too, so that worker processes record as well
+        os.environ[instrument.ENV] = "memory" if args.trace_memory else "1"
+        instrument.enable(memory=args.trace_memory)
+
+    if args.imports:
+        reports = import_times(args.days or None)
+        table = format_imports
+    else:
+        reports = bench(args.days or None, args.inputs, args.repeat, args.warmup, args.jobs)
+        table = format_table
+    results = [report.to_dict() for report in reports]
+    if args.instrument is not None and not args.imports:
+        instrument.write(args.instrument, {r.name: r.instrument for r in reports if r.instrument is not None})
+    if args.json is not None and str(args.json) == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    print(table(reports))
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""AoC :: timing the parse and solve phases of each day"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+import gc
+import importlib
+import os
+from pathlib import Path
+import re
+import statistics
+import time
+import tracemalloc
+from types import ModuleType
+from typing import Any, Callable, Generator, Iterable
+
+import numpy as np
+
+from aoc import instrument
+
+# Constants
+ROOT = Path(__file__).parent.parent
+DAY_PATTERN = re.compile(r"Day(\d\d)")
+
+# A plan yields (phase, thunk) for each phase of a day and is sent back the thunk's result
+Plan = Generator[tuple[str, Callable[[], Any]], Any, None]
+
+
+def discover(root: Path = ROOT) -> dict[int, str]:
+    """Find the DayNN packages in the repo, by day number"""
+    days = {}
+    for path in sorted(root.glob("Day*/__main__.py")):
+        if m := DAY_PATTERN.fullmatch(path.parent.name):
+            days[int(m.group(1))] = path.parent.name
+    return days
+
+
+def default_plan(day: ModuleType, path: Path) -> Plan:
+    """parse, then part_one and part_two on its result, or the two answers of solution_generator"""
+    data = yield "parse", lambda: day.parse(path)
+    if hasattr(day, "solution_generator"):
+        gen = day.solution_generator(data)
+        yield "part_one", lambda: next(gen)
+        yield "part_two", lambda: next(gen)
+    else:
+        yield "part_one", lambda: day.part_one(data)
+        yield "part_two", lambda: day.part_two(data)
+
+
+def _day03(day: ModuleType, path: Path) -> Plan:
+    banks = yield "parse", lambda: day.parse_array(path)
+    yield "part_one", lambda: sum(day.solve_batch(banks, 2).tolist())
+    yield "part_two", lambda: sum(day.solve_batch(banks, 12).tolist())
+
+
+def _day04(day: ModuleType, path: Path) -> Plan:
+    data = yield "parse", lambda: day.parse(path)
+    coords = yield "part_one", lambda: day.part_one(data)
+    yield "part_two", lambda: day.part_two(data, coords)
+
+
+def _day05(day: ModuleType, path: Path) -> Plan:
+    ranges, ids = yield "parse", lambda: day.parse(path)
+    yield "part_one", lambda: day.part_one(ranges, ids)
+    yield "part_two", lambda: day.part_two(ranges)
+
+
+def _day07(day: ModuleType, path: Path) -> Plan:
+    start_index, rows = yield "parse", lambda: day.parse(path)
+    yield "part_one", lambda: day.part_one(start_index, rows)
+    yield "part_two", lambda: day.part_two(start_index, rows)
+
+
+def _day11(day: ModuleType, path: Path) -> Plan:
+    compiled = yield "parse", lambda: day.DeviceGraph.parse(path)
+    yield "part_one", lambda: day.part_one(compiled)
+    yield "part_two", lambda: day.part_two(compiled, visits={"dac", "fft"})
+
+
+def _day12(day: ModuleType, path: Path) -> Plan:
+    shapes, regions = yield "parse", lambda: day.parse(path)
+    yield "part_one", lambda: day.part_one(shapes, regions)
+
+
+# Days whose entry points do not chain the default way
+PLANS: dict[int, Callable[[ModuleType, Path], Plan]] = {
+    3: _day03,
+    4: _day04,
+    5: _day05,
+    7: _day07,
+    11: _day11,
+    12: _day12,
+}
+
+
+@dataclass
+class PhaseStats:
+    """Measurements of one phase over every timed repetition"""
+    phase: str
+    wall: list[float] = field(default_factory=list)
+    cpu: list[float] = field(default_factory=list)
+    peak: int = 0
+    answer: str | None = None
+
+    def summary(self) -> dict[str, Any]:
+        """Summary statistics alongside the raw timings"""
+        return {
+            "phase": self.phase,
+            "wall_min": min(self.wall, default=None),
+            "wall_median": statistics.median(self.wall) if self.wall else None,
+            "wall_mean": statistics.fmean(self.wall) if self.wall else None,
+            "cpu_median": statistics.median(self.cpu) if self.cpu else None,
+            "peak_bytes": self.peak,
+            "answer": self.answer,
+            "wall": self.wall,
+            "cpu": self.cpu,
+        }
+
+
+@dataclass
+class DayReport:
+    """Every phase of one day, or the error that stopped it"""
+    day: int
+    name: str
+    input: str
+    phases: list[PhaseStats] = field(default_factory=list)
+    error: str | None = None
+    # What the solvers recorded over the timed runs, when instrumentation is on
+    instrument: dict[str, Any] | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        report = asdict(self)
+        report["phases"] = [phase.summary() for phase in self.phases]
+        return report
+
+
+def _cpu_time() -> float:
+    """CPU time of this process and of any worker processes it has reaped"""
+    children = os.times()
+    return time.process_time() + children.children_user + children.children_system
+
+
+def _run(plan: Plan, on_phase: Callable[[str, Callable[[], Any]], Any]):
+    """Drive a plan, handing each phase to on_phase and sending its result back in"""
+    try:
+        phase, thunk = next(plan)
+        while True:
+            phase, thunk = plan.send(on_phase(phase, thunk))
+    except StopIteration:
+        pass
+
+
+def bench_day(day: int, name: str, path: Path | None = None, repeat: int = 5, warmup: int = 1) -> DayReport:
+    """
+    Time every phase of a day over `repeat` runs after `warmup` untimed ones
+
+    Peak memory is taken from one further run under tracemalloc, so that tracing does
+    not slow down the timed runs. When instrumentation is on, the report carries what the
+    solvers recorded over the timed runs, nested under the phases timed here.
+    """
+    report = DayReport(day, name, "" if path is None else str(path))
+    try:
+        module = importlib.import_module(f"{name}.__main__")
+    except Exception as e:
+        report.error = f"{type(e).__name__}: {e}"
+        return report
+    path = module.input_path if path is None else path
+    report.input = str(path)
+    if not path.exists():
+        report.error = "no input"
+        return report
+    plan = PLANS.get(day, default_plan)
+    stats: dict[str, PhaseStats] = {}
+
+    def timed(phase: str, thunk: Callable[[], Any]):
+        gc.collect()
+        wall, cpu = time.perf_counter(), _cpu_time()
+        with instrument.phase(phase):
+            result = thunk()
+        wall, cpu = time.perf_counter() - wall, _cpu_time() - cpu
+        record = stats.setdefault(phase, PhaseStats(phase))
+        record.wall.append(wall)
+        record.cpu.append(cpu)
+        if phase.startswith("part"):
+            # Answers that come back as a mask of cells are counted
+            record.answer = str(result.sum() if isinstance(result, np.ndarray) else result)
+        return result
+
+    def traced(phase: str, thunk: Callable[[], Any]):
+        gc.collect()
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        result = thunk()
+        stats.setdefault(phase, PhaseStats(phase)).peak = tracemalloc.get_traced_memory()[1] - start
+        return result
+
+    try:
+        for _ in range(warmup):
+            _run(plan(module, path), lambda phase, thunk: thunk())
+        instrument.reset()
+        for _ in range(repeat):
+            _run(plan(module, path), timed)
+        if instrument.ENABLED:
+            report.instrument = instrument.snapshot()
+        # Instrumentation may already be tracing allocations, in which case leave it be
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        try:
+            _run(plan(module, path), traced)
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+    except Exception as e:
+        report.error = f"{type(e).__name__}: {e}"
+    report.phases = list(stats.values())
+    return report
+
+
+def bench(
+    days: Iterable[int] | None = None,
+    inputs: Path | None = None,
+    repeat: int = 5,
+    warmup: int = 1,
+    jobs: int = 1,
+) -> list[DayReport]:
+    """
+    Benchmark the chosen days, or all of them, in day order
+
+    Inputs are read from `inputs`/DayNN.in when a directory is given, otherwise from each
+    day's own input_path. With more than one job the days run in separate processes.
+    """
+    found = discover()
+    chosen = sorted(found) if days is None else sorted(days)
+    missing = set(chosen) - found.keys()
+    if missing:
+        raise ValueError(f"no package for days {sorted(missing)}")
+    args = [
+        (day, found[day], None if inputs is None else inputs / f"{found[day]}.in", repeat, warmup)
+        for day in chosen
+    ]
+    if jobs == 1:
+        return [bench_day(*a) for a in args]
+    with ProcessPoolExecutor(jobs) as pool:
+        return list(pool.map(bench_day, *zip(*args)))
+
+
+def format_table(reports: list[DayReport]) -> str:
+    """Lay the median timings and peak memory of every phase out as a text table"""
+    header = ("day", "phase", "wall ms", "min ms", "cpu ms", "peak MiB", "answer")
+    rows = []
+    for report in reports:
+        if report.error and not report.phases:
+            rows.append((report.name, "-", "", "", "", "", report.error))
+            continue
+        for stats in report.phases:
+            s = stats.summary()
+            rows.append((
+                report.name,
+                stats.phase,
+                f"{1000 * s['wall_median']:.2f}" if s["wall_median"] is not None else "",
+                f"{1000 * s['wall_min']:.2f}" if s["wall_min"] is not None else "",
+                f"{1000 * s['cpu_median']:.2f}" if s["cpu_median"] is not None else "",
+                f"{stats.peak / 2**20:.2f}",
+                (stats.answer or "")[:24],
+            ))
+        if report.error:
+            rows.append((report.name, "-", "", "", "", "", report.error))
+    widths = [max(len(str(row[i])) for row in [header, *rows]) for i in range(len(header))]
+    lines = ["  ".join(str(v).ljust(w) for v, w in zip(header, widths))]
+    lines.append("  ".join("-" * w for w in widths))
+    lines += ["  ".join(str(v).ljust(w) for v, w in zip(row, widths)) for row in rows]
+    return "\n".join(lines)
@@ -0,0 +1,36 @@
+"""
+AoC :: seeded synthetic inputs for every day, at any scale
+
+Each dayNN module has a `generate(scale, rng, answers)` that returns a Puzzle whose
+text parses like the real DayNN.in. A scale of 1 is about the size of a real input.
+Answers are included where the construction or a cheap reference gives them, so the
+solvers can be checked as well as timed.
+"""
+from dataclasses import dataclass, field
+import importlib
+import json
+from pathlib import Path
+import random
+
+
+@dataclass
+class Puzzle:
+    """A generated input and whichever of its answers are known"""
+    text: str
+    answers: dict[str, int] = field(default_factory=dict)
+
+
+def generate(day: int, scale: float = 1, seed: int = 0, answers: bool = True) -> Puzzle:
+    """Generate an input for a day, the same one every time for the same scale and seed"""
+    module = importlib.import_module(f"{__name__}.day{day:02d}")
+    return module.generate(scale, random.Random(seed), answers)
+
+
+def write(day: int, puzzle: Puzzle, directory: Path) -> Path:
+    """Write DayNN.in, and DayNN.answers.json if any answers are known, into a directory"""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"Day{day:02d}.in"
+    path.write_text(puzzle.text)
+    if puzzle.answers:
+        (directory / f"Day{day:02d}.answers.json").write_text(json.dumps(puzzle.answers))
+    return path
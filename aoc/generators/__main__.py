@@ -0,0 +1,25 @@
+"""AoC :: write generated inputs, e.g. python -m aoc.generators 8 9 --scale 100 --out inputs"""
+import argparse
+from pathlib import Path
+
+from aoc.generators import generate, write
+
+
+def main(argv: list[str] | None = None):
+    """Parse the command line and write an input for each chosen day"""
+    parser = argparse.ArgumentParser(prog="python -m aoc.generators", description="Write synthetic puzzle inputs")
+    parser.add_argument("days", nargs="*", type=int, help="days to generate, all of them by default")
+    parser.add_argument("-s", "--scale", type=float, default=1, help="size relative to a real input")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--out", type=Path, default=Path("inputs"), help="directory to write DayNN.in into")
+    parser.add_argument("--no-answers", action="store_true", help="skip working out the known answers")
+    args = parser.parse_args(argv)
+
+    for day in args.days or range(1, 13):
+        puzzle = generate(day, args.scale, args.seed, not args.no_answers)
+        path = write(day, puzzle, args.out)
+        print(f"{path}: {len(puzzle.text.splitlines())} lines, answers {puzzle.answers or 'unknown'}")
+
+
+if __name__ == '__main__':
+    main()
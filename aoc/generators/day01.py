@@ -0,0 +1,29 @@
+"""AoC :: Day 1 input generator"""
+import random
+
+from aoc.generators import Puzzle
+
+# Rotations in a real input
+SIZE = 4000
+DIAL = 100
+
+
+def generate(scale: float, rng: random.Random, answers: bool = True) -> Puzzle:
+    """Random left and right rotations of up to ten turns of the dial"""
+    rotations = [rng.choice((-1, 1)) * rng.randint(1, 10 * DIAL - 1) for _ in range(max(1, round(SIZE * scale)))]
+    text = "\n".join(f"{'L' if r < 0 else 'R'}{abs(r)}" for r in rotations) + "\n"
+    if not answers:
+        return Puzzle(text)
+
+    # Count every click that leaves the dial on zero
+    position, landings, crossings = 50, 0, 0
+    for r in rotations:
+        if r > 0:
+            crossings += (position + r) // DIAL
+        elif position == 0:
+            crossings += -r // DIAL
+        elif -r >= position:
+            crossings += (-r - position) // DIAL + 1
+        position = (position + r) % DIAL
+        landings += position == 0
+    return Puzzle(text, {"part_one": landings, "part_two": crossings})
@@ -0,0 +1,48 @@
+"""AoC :: Day 2 input generator"""
+from bisect import bisect_left
+import random
+
+from aoc.generators import Puzzle
+
+# Ranges in a real input
+SIZE = 35
+MAX_DIGITS = 10
+
+
+def repeated_ids(lo: int, hi: int, exactly_twice: bool) -> set[int]:
+    """Every id in [lo, hi] made of a block of digits repeated, listed one block at a time"""
+    found = set()
+    for length in range(len(str(lo)), len(str(hi)) + 1):
+        for block in range(1, length // 2 + 1):
+            if length % block or (exactly_twice and length != 2 * block):
+                continue
+            # A block b repeated gives b * 1000..1000100..001
+            multiplier = (10**length - 1) // (10**block - 1)
+            first = max(10**(block - 1), -(-lo // multiplier))
+            last = min(10**block - 1, hi // multiplier)
+            found.update(b * multiplier for b in range(first, last + 1))
+    return found
+
+
+def generate(scale: float, rng: random.Random, answers: bool = True) -> Puzzle:
+    """Disjoint ranges of ids of up to ten digits, each up to a few million wide"""
+    starts: list[int] = []
+    ranges: list[tuple[int, int]] = []
+    while len(ranges) < max(1, round(SIZE * scale)):
+        digits = rng.randint(1, MAX_DIGITS)
+        lo = rng.randint(10**(digits - 1), 10**digits - 1)
+        hi = lo + rng.randint(0, min(10**digits, 5_000_000))
+        # Keep the ranges apart from each other
+        i = bisect_left(starts, lo)
+        if (i and ranges[i - 1][1] >= lo) or (i < len(ranges) and ranges[i][0] <= hi):
+            continue
+        starts.insert(i, lo)
+        ranges.insert(i, (lo, hi))
+    shuffled = rng.sample(ranges, len(ranges))
+    text = ",".join(f"{lo}-{hi}" for lo, hi in shuffled) + "\n"
+    if not answers:
+        return Puzzle(text)
+    return Puzzle(text, {
+        "part_one": sum(sum(repeated_ids(lo, hi, True)) for lo, hi in ranges),
+        "part_two": sum(sum(repeated_ids(lo, hi, False)) for lo, hi in ranges),
+    })
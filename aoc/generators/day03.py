@@ -0,0 +1,32 @@
+"""AoC :: Day 3 input generator"""
+import random
+
+from aoc.generators import Puzzle
+
+# Banks in a real input, and batteries per bank
+SIZE = 200
+WIDTH = 100
+
+
+def largest(bank: str, digits: int) -> int:
+    """The largest number made of `digits` of the bank's digits, kept in order"""
+    stack: list[str] = []
+    drops = len(bank) - digits
+    for digit in bank:
+        while drops and stack and stack[-1] < digit:
+            stack.pop()
+            drops -= 1
+        stack.append(digit)
+    return int("".join(stack[:digits]))
+
+
+def generate(scale: float, rng: random.Random, answers: bool = True) -> Puzzle:
+    """Banks of random joltage ratings from 1 to 9"""
+    banks = ["".join(rng.choices("123456789", k=WIDTH)) for _ in range(max(1, round(SIZE * scale)))]
+    text = "\n".join(banks) + "\n"
+    if not answers:
+        return Puzzle(text)
+    return Puzzle(text, {
+        "part_one": sum(largest(bank, 2) for bank in banks),
+        "part_two": sum(largest(bank, 12) for bank in banks),
+    })
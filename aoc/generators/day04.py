@@ -0,0 +1,37 @@
+"""AoC :: Day 4 input generator"""
+from collections import deque
+import math
+import random
+
+from aoc.generators import Puzzle
+
+# Side of a real input, and the share of cells holding a roll
+SIDE = 137
+DENSITY = 0.7
+NEIGHBOURS = [(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc]
+
+
+def generate(scale: float, rng: random.Random, answers: bool = True) -> Puzzle:
+    """A square grid of randomly placed rolls, with `scale` times the cells of a real one"""
+    side = max(1, round(SIDE * math.sqrt(scale)))
+    rows = ["".join("@" if rng.random() < DENSITY else "." for _ in range(side)) for _ in range(side)]
+    text = "\n".join(rows) + "\n"
+    if not answers:
+        return Puzzle(text)
+
+    # Peel off rolls with fewer than four neighbours until none are left to take
+    rolls = {(r, c) for r, row in enumerate(rows) for c, cell in enumerate(row) if cell == "@"}
+    count = {(r, c): sum((r + dr, c + dc) in rolls for dr, dc in NEIGHBOURS) for r, c in rolls}
+    accessible = [roll for roll in rolls if count[roll] < 4]
+    removed = set(accessible)
+    queue = deque(accessible)
+    while queue:
+        r, c = queue.popleft()
+        for dr, dc in NEIGHBOURS:
+            neighbour = (r + dr, c + dc)
+            if neighbour in count and neighbour not in removed:
+                count[neighbour] -= 1
+                if count[neighbour] < 4:
+                    removed.add(neighbour)
+                    queue.append(neighbour)
+    return Puzzle(text, {"part_one": len(accessible), "part_two": len(removed)})
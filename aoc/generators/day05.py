@@ -0,0 +1,38 @@
+"""AoC :: Day 5 input generator"""
+from bisect import bisect_right
+import random
+
+from aoc.generators import Puzzle
+
+# Fresh ranges and ingredients in a real input, and the largest id
+RANGES = 190
+IDS = 1000
+MAX_ID = 500_000_000_000_000
+
+
+def generate(scale: float, rng: random.Random, answers: bool = True) -> Puzzle:
+    """Overlapping fresh ranges over huge ids, and ingredients about half of which are fresh"""
+    ranges = []
+    for _ in range(max(1, round(RANGES * scale))):
+        start = rng.randint(1, MAX_ID)
+        ranges.append((start, start + rng.randint(0, MAX_ID // 1000)))
+    ids = []
+    for _ in range(max(1, round(IDS * scale))):
+        if rng.random() < 0.5:
+            lo, hi = rng.choice(ranges)
+            ids.append(rng.randint(lo, hi))
+        else:
+            ids.append(rng.randint(1, MAX_ID))
+    text = "\n".join(f"{lo}-{hi}" for lo, hi in ranges) + "\n\n" + "\n".join(map(str, ids)) + "\n"
+    if not answers:
+        return Puzzle(text)
+
+    merged: list[list[int]] = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    starts = [lo for lo, _ in merged]
+    fresh = sum(1 for i in ids if (j := bisect_right(starts, i) - 1) >= 0 and i <= merged[j][1])
+    return Puzzle(text, {"part_one": fresh, "part_two": sum(hi - lo + 1 for lo, hi in merged)})
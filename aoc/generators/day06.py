@@ -0,0 +1,47 @@
+"""AoC :: Day 6 input generator"""
+from collections import deque
+import math
+import random
+
+from aoc.generators import Puzzle
+
+# Problems in a real input, and numbers per problem
+SIZE = 1000
+ROWS = 4
+
+
+def generate(scale: float, rng: random.Random, answers: bool = True) -> Puzzle:
+    """
+    Problems of up to four digit numbers, all aligned left or all right within their columns
+
+    The answers are read straight off each problem's block of characters as it is made.
+    """
+    lines = [[] for _ in range(ROWS + 1)]
+    row_total = column_total = 0
+    for _ in range(max(1, round(SIZE * scale))):
+        width = rng.randint(1, 4)
+        # One full width number stops the problem having a blank column
+        drawn = sorted([width] + [rng.randint(1, width) for _ in range(ROWS - 1)], reverse=True)
+        # Lengths rise then fall down the problem, as in real inputs, so that the digits of
+        # every column are contiguous whichever way the numbers are aligned
+        lengths = deque()
+        for n in drawn:
+            if rng.random() < 0.5:
+                lengths.appendleft(n)
+            else:
+                lengths.append(n)
+        numbers = [str(rng.randint(10**(n - 1), 10**n - 1)) for n in lengths]
+        # Real inputs also align every number of a problem the same way
+        align = str.ljust if rng.random() < 0.5 else str.rjust
+        block = [align(n, width) for n in numbers]
+        op = rng.choice("*+")
+        for line, cells in zip(lines, block + [op.ljust(width)]):
+            line.append(cells)
+
+        solve = math.prod if op == "*" else sum
+        row_total += solve(map(int, numbers))
+        columns = ("".join(row[c] for row in block).strip() for c in range(width))
+        column_total += solve(map(int, columns))
+    # Every problem, the last included, is followed by a blank column
+    text = "\n".join(" ".join(line) + " " for line in lines) + "\n"
+    return Puzzle(text, {"part_one": row_total, "part_two": column_total} if answers else {})
@@ -0,0 +1,42 @@
+"""AoC :: Day 7 input generator"""
+import math
+import random
+
+from aoc.generators import Puzzle
+
+# Side of a real input, and the chance of a splitter in a splitter row
+SIDE = 141
+DENSITY = 0.4
+
+
+def generate(scale: float, rng: random.Random, answers: bool = True) -> Puzzle:
+    """
+    A manifold with the start in the middle of the top row and splitters on every other row
+
+    Splitters are kept off the edges so that no beam leaves the manifold.
+    """
+    side = max(3, round(SIDE * math.sqrt(scale)))
+    rows = ["." * (side // 2) + "S" + "." * (side - side // 2 - 1)]
+    for r in range(1, side):
+        if r % 2:
+            rows.append("." * side)
+        else:
+            rows.append("." + "".join("^" if rng.random() < DENSITY else "." for _ in range(side - 2)) + ".")
+    text = "\n".join(rows) + "\n"
+    if not answers:
+        return Puzzle(text)
+
+    # Follow the number of timelines in each column down the manifold
+    timelines = {side // 2: 1}
+    splits = 0
+    for row in rows[1:]:
+        following: dict[int, int] = {}
+        for c, n in timelines.items():
+            if row[c] == "^":
+                splits += 1
+                following[c - 1] = following.get(c - 1, 0) + n
+                following[c + 1] = following.get(c + 1, 0) + n
+            else:
+                following[c] = following.get(c, 0) + n
+        timelines = following
+    return Puzzle(text, {"part_one": splits, "part_two": sum(timelines.values())})
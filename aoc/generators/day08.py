@@ -0,0 +1,54 @@
+"""AoC :: Day 8 input generator"""
+import heapq
+import itertools
+import math
+import random
+
+from aoc.generators import Puzzle
+
+# Junction boxes in a real input, the extent of the space they sit in, and the
+# connections made for part one
+SIZE = 1000
+EXTENT = 100_000
+CONNECTIONS = 1000
+# Largest input whose answers are worked out by checking every pair
+ANSWER_LIMIT = 3000
+
+
+def generate(scale: float, rng: random.Random, answers: bool = True) -> Puzzle:
+    """Junction boxes scattered uniformly through a cube"""
+    n = max(2, round(SIZE * scale))
+    boxes = [tuple(rng.randrange(EXTENT) for _ in range(3)) for _ in range(n)]
+    text = "\n".join(",".join(map(str, box)) for box in boxes) + "\n"
+    if not answers or n > ANSWER_LIMIT:
+        return Puzzle(text)
+
+    # Kruskal over every pair, closest first
+    pairs = sorted(
+        (sum((a - b) ** 2 for a, b in zip(boxes[i], boxes[j])), i, j) for i, j in itertools.combinations(range(n), 2)
+    )
+    parent = list(range(n))
+    size = [1] * n
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    result = {}
+    components = n
+    for k, (_, i, j) in enumerate(pairs):
+        if k == CONNECTIONS:
+            roots = {find(b) for b in range(n)}
+            result["part_one"] = math.prod(heapq.nlargest(3, (size[r] for r in roots)))
+        a, b = find(i), find(j)
+        if a != b:
+            parent[a] = b
+            size[b] += size[a]
+            components -= 1
+            if components == 1:
+                result["part_two"] = boxes[i][0] * boxes[j][0]
+                if "part_one" in result:
+                    break
+    return Puzzle(text, result)
@@ -0,0 +1,102 @@
+"""AoC :: Day 9 input generator"""
+import math
+import random
+
+import numpy as np
+
+from aoc.generators import Puzzle
+
+# Columns of the loop for a scale of one, which gives about five hundred corners, and
+# how far each column's ends can move from the last one's
+SIZE = 150
+STEP = 3
+# Largest number of red tiles whose answers are worked out
+ANSWER_LIMIT = 2000
+
+
+def _spans(columns: int, rng: random.Random) -> list[tuple[int, int]]:
+    """
+    The (bottom, top) of each column of cells of the loop, each wandering from the last
+
+    Neighbouring spans always share a cell, so the loop is simple and has no holes.
+    """
+    lo, hi = 0, rng.randint(1, STEP)
+    spans = []
+    for _ in range(columns):
+        spans.append((lo, hi))
+        lo, hi = lo + rng.randint(-STEP, STEP), hi + rng.randint(-STEP, STEP)
+        # Keep the next span non-empty and overlapping this one
+        lo = min(lo, spans[-1][1] - 1)
+        hi = max(hi, spans[-1][0] + 1, lo + 1)
+    return spans
+
+
+def _outline(spans: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Corners of the loop around the columns of cells, going round it once"""
+    # Along the tops from left to right, then back along the bottoms
+    path = [p for i, (_, top) in enumerate(spans) for p in ((i, top), (i + 1, top))]
+    path += [p for i, (bottom, _) in reversed(list(enumerate(spans))) for p in ((i + 1, bottom), (i, bottom))]
+    path = [p for p, q in zip(path, path[1:] + path[:1]) if p != q]
+    return [p for a, p, b in zip(path[-1:] + path[:-1], path, path[1:] + path[:1]) if not (a[0] == p[0] == b[0] or a[1] == p[1] == b[1])]
+
+
+def inside_pairs(spans: list[tuple[int, int]], corners: np.ndarray) -> np.ndarray:
+    """
+    Whether the rectangle between each pair of corners i < j lies inside the loop
+
+    This goes by the spans the loop was made from rather than by its outline. The loop is
+    the union of closed cells, so a rectangle from x0 < x1 is inside when every column
+    from x0 to x1 - 1 reaches from y0 to y1. A rectangle of no width at x is inside when
+    the columns on either side of x, which overlap, reach from y0 to y1 between them.
+    """
+    lo, hi = np.array(spans).T
+    n = len(spans)
+    # Highest bottom and lowest top over columns a to b - 1, or around the line x = a if b == a
+    floor = np.full((n + 1, n + 1), np.iinfo(np.int64).max)
+    ceiling = np.full((n + 1, n + 1), np.iinfo(np.int64).min)
+    for a in range(n):
+        floor[a, a + 1:] = np.maximum.accumulate(lo[a:])
+        ceiling[a, a + 1:] = np.minimum.accumulate(hi[a:])
+    for x in range(n + 1):
+        sides = slice(max(x - 1, 0), min(x + 1, n))
+        floor[x, x], ceiling[x, x] = lo[sides].min(), hi[sides].max()
+
+    i, j = np.triu_indices(len(corners), 1)
+    x0, x1 = np.minimum(corners[i, 0], corners[j, 0]), np.maximum(corners[i, 0], corners[j, 0])
+    y0, y1 = np.minimum(corners[i, 1], corners[j, 1]), np.maximum(corners[i, 1], corners[j, 1])
+    return (floor[x0, x1] <= y0) & (y1 <= ceiling[x0, x1])
+
+
+def generate(scale: float, rng: random.Random, answers: bool = True) -> Puzzle:
+    """
+    The corners of a random rectilinear loop with no holes, stretched over a wide grid
+
+    Part two's answer comes from the columns the loop is built from, independently of
+    how the solver reads the loop back from its corners.
+    """
+    spans = _spans(max(1, round(SIZE * scale)), rng)
+    base = _outline(spans)
+    transpose = rng.random() < 0.5
+    corners = [(y, x) for x, y in base] if transpose else base
+    # Spread the grid lines out, always leaving whole tiles between neighbouring lines
+    spread = {}
+    for axis in (0, 1):
+        position = rng.randint(0, 3)
+        for line in sorted({p[axis] for p in corners}):
+            spread[axis, line] = position
+            position += rng.randint(2, max(2, round(100 / math.sqrt(scale))))
+    order = list(range(len(corners)))
+    start = rng.randrange(len(corners))
+    order = order[start:] + order[:start]
+    if rng.random() < 0.5:
+        order.reverse()
+    corners = [(spread[0, corners[k][0]], spread[1, corners[k][1]]) for k in order]
+    text = "\n".join(f"{x},{y}" for x, y in corners) + "\n"
+    if not answers or len(corners) > ANSWER_LIMIT:
+        return Puzzle(text)
+
+    xs, ys = np.array(corners).T
+    i, j = np.triu_indices(len(corners), 1)
+    areas = (np.abs(xs[i] - xs[j]) + 1) * (np.abs(ys[i] - ys[j]) + 1)
+    inside = inside_pairs(spans, np.array([base[k] for k in order]))
+    return Puzzle(text, {"part_one": int(areas.max()), "part_two": int(areas[inside].max())})
@@ -0,0 +1,47 @@
+"""AoC :: Day 10 input generator"""
+import random
+
+from aoc.generators import Puzzle
+
+# Machines in a real input, and the most presses of any one button planted in a machine
+SIZE = 170
+PRESSES = 30
+
+
+def fewest_toggles(buttons: list[int], goal: int) -> int:
+    """Fewest buttons whose toggles combine to the goal, trying every subset in Gray code order"""
+    best = 0 if goal == 0 else len(buttons) + 1
+    state = 0
+    for k in range(1, 1 << len(buttons)):
+        # The k-th Gray code differs from the one before it in the lowest set bit of k
+        state ^= buttons[(k & -k).bit_length() - 1]
+        if state == goal:
+            best = min(best, (k ^ (k >> 1)).bit_count())
+    return best
+
+
+def generate(scale: float, rng: random.Random, answers: bool = True) -> Puzzle:
+    """
+    Machines whose goals and joltages come from planted button presses, so both can be met
+
+    The fewest presses for the lights come from trying every set of buttons. The fewest
+    for the joltages need an integer program, so they are not given.
+    """
+    lines = []
+    toggles = 0
+    for _ in range(max(1, round(SIZE * scale))):
+        lights = rng.randint(3, 10)
+        buttons = [sorted(rng.sample(range(lights), rng.randint(1, lights))) for _ in range(rng.randint(3, 13))]
+        masks = [sum(1 << i for i in button) for button in buttons]
+        presses = [rng.randint(0, PRESSES) for _ in buttons]
+        goal = 0
+        for mask in rng.sample(masks, rng.randint(0, len(masks))):
+            goal ^= mask
+        joltage = [sum(p for button, p in zip(buttons, presses) if i in button) for i in range(lights)]
+        diagram = "".join("#" if goal >> i & 1 else "." for i in range(lights))
+        wiring = " ".join("(" + ",".join(map(str, button)) + ")" for button in buttons)
+        lines.append(f"[{diagram}] {wiring} {{{','.join(map(str, joltage))}}}")
+        if answers:
+            toggles += fewest_toggles(masks, goal)
+    text = "\n".join(lines) + "\n"
+    return Puzzle(text, {"part_one": toggles} if answers else {})
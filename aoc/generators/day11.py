@@ -0,0 +1,76 @@
+"""AoC :: Day 11 input generator"""
+import itertools
+import random
+import string
+
+from aoc.generators import Puzzle
+
+# Devices in a real input, levels they are spread over, and the most outputs of a device
+SIZE = 600
+LEVELS = 24
+OUTPUTS = 3
+# Devices the puzzle asks about, and the level each one sits on as a share of the depth
+NAMED = {"svr": 0.0, "you": 0.25, "fft": 0.4, "dac": 0.7, "out": 1.0}
+
+
+def _names(rng: random.Random):
+    """Unique device names, all of three letters in random order, then all of four, and so on"""
+    for length in itertools.count(3):
+        names = ["".join(p) for p in itertools.product(string.ascii_lowercase, repeat=length)]
+        rng.shuffle(names)
+        yield from (name for name in names if name not in NAMED)
+
+
+def generate(scale: float, rng: random.Random, answers: bool = True) -> Puzzle:
+    """
+    A levelled DAG where every device feeds devices on the next few levels
+
+    The named devices are threaded onto one path, so every route the puzzle asks about
+    exists. The path counts are worked out level by level as the graph is made.
+    """
+    n = max(len(NAMED), round(SIZE * scale))
+    depth = max(len(NAMED), round(LEVELS * scale ** (1 / 3)))
+    fresh = _names(rng)
+    levels = [[] for _ in range(depth)]
+    for name, share in NAMED.items():
+        levels[round(share * (depth - 1))].append(name)
+    for _ in range(n - len(NAMED)):
+        # Nothing sits alongside out on the last level
+        levels[rng.randrange(depth - 1)].append(next(fresh))
+
+    outputs: dict[str, list[str]] = {}
+    for level, devices in enumerate(levels[:-1]):
+        for device in devices:
+            reach = [d for later in levels[level + 1:level + 4] for d in later]
+            outputs[device] = rng.sample(reach, min(len(reach), rng.randint(1, OUTPUTS)))
+    # Thread the named devices together in level order, through one device on each level between
+    level_of = {device: level for level, devices in enumerate(levels) for device in devices}
+    chain = sorted(NAMED, key=NAMED.get)
+    for a, b in zip(chain, chain[1:]):
+        between = [rng.choice(levels[level]) for level in range(level_of[a] + 1, level_of[b]) if levels[level]]
+        path = [a, *between, b]
+        for u, v in zip(path, path[1:]):
+            if v not in outputs[u]:
+                outputs[u].append(v)
+
+    lines = [f"{device}: {' '.join(targets)}" for device, targets in outputs.items()]
+    rng.shuffle(lines)
+    text = "\n".join(lines) + "\n"
+    if not answers:
+        return Puzzle(text)
+
+    order = [device for devices in levels for device in devices]
+
+    def paths(start: str, stop: str) -> int:
+        counts = {start: 1}
+        for device in order:
+            for target in outputs.get(device, ()):
+                if device in counts:
+                    counts[target] = counts.get(target, 0) + counts[device]
+        return counts.get(stop, 0)
+
+    return Puzzle(text, {
+        "part_one": paths("you", "out"),
+        "part_two": paths("svr", "fft") * paths("fft", "dac") * paths("dac", "out"),
+    })
+
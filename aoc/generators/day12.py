@@ -0,0 +1,71 @@
+"""AoC :: Day 12 input generator"""
+import random
+
+import numpy as np
+
+from aoc.generators import Puzzle
+
+# Regions in a real input, and the shapes of its presents
+SIZE = 1000
+SHAPES = [
+    "###\n##.\n##.",
+    "###\n##.\n.##",
+    ".##\n###\n##.",
+    "##.\n###\n##.",
+    "###\n#..\n###",
+    "###\n.#.\n###",
+]
+
+
+def _plant(width: int, length: int, shapes: list[np.ndarray], rng: random.Random) -> list[int]:
+    """Drop presents at random spots in a region until it is crowded, counting each shape"""
+    region = np.zeros((length, width), dtype=bool)
+    counts = [0] * len(shapes)
+    for _ in range(8 * width * length):
+        i = rng.randrange(len(shapes))
+        shape = np.rot90(shapes[i], rng.randrange(4))
+        if rng.random() < 0.5:
+            shape = np.fliplr(shape)
+        h, w = shape.shape
+        if h > length or w > width:
+            continue
+        r, c = rng.randint(0, length - h), rng.randint(0, width - w)
+        if not (region[r:r + h, c:c + w] & shape).any():
+            region[r:r + h, c:c + w] |= shape
+            counts[i] += 1
+    return counts
+
+
+def generate(scale: float, rng: random.Random, answers: bool = True) -> Puzzle:
+    """
+    Regions that are too small for their presents, roomy enough to fit each present's
+    bounding box side by side, or small and crowded with presents that are known to fit
+
+    Every region's answer is known from how it was made.
+    """
+    shapes = [np.array([[c == "#" for c in row] for row in shape.splitlines()]) for shape in SHAPES]
+    areas = [int(shape.sum()) for shape in shapes]
+    lines = []
+    fits = 0
+    for _ in range(max(1, round(SIZE * scale))):
+        kind = rng.random()
+        if kind < 0.1:
+            width, length = rng.randint(4, 12), rng.randint(4, 12)
+            counts = _plant(width, length, shapes, rng)
+            fits += 1
+        else:
+            width, length = rng.randint(35, 50), rng.randint(35, 50)
+            counts = [0] * len(shapes)
+            if kind < 0.55:
+                # Room for a 3x3 box per present
+                for _ in range((width // 3) * (length // 3) - rng.randint(0, 10)):
+                    counts[rng.randrange(len(shapes))] += 1
+                fits += 1
+            else:
+                # More present than region
+                while sum(c * a for c, a in zip(counts, areas)) <= width * length:
+                    counts[rng.randrange(len(shapes))] += 1
+        lines.append(f"{width}x{length}: {' '.join(map(str, counts))}")
+    presents = "\n\n".join(f"{i}:\n{shape}" for i, shape in enumerate(SHAPES))
+    text = presents + "\n\n" + "\n".join(lines) + "\n"
+    return Puzzle(text, {"part_one": fits} if answers else {})
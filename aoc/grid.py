@@ -0,0 +1,69 @@
+"""AoC :: zero-copy loading of text grids"""
+import mmap
+import os
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+NEWLINE, CR = ord("\n"), ord("\r")
+
+
+def grid_from_buffer(buffer) -> np.ndarray:
+    """
+    View a buffer of equal-width newline separated rows as a 2-D uint8 array
+
+    The row stride is taken from the first newline and the line endings, LF or CRLF,
+    are skipped by the strides, so no bytes are copied. Every row is checked to end
+    where the first one does, so ragged rows raise rather than shifting columns.
+    """
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    # Ignore trailing blank lines
+    end = len(raw)
+    while end and raw[end - 1] in (NEWLINE, CR):
+        end -= 1
+    if not end:
+        return np.zeros((0, 0), dtype=np.uint8)
+    row_end = np.flatnonzero(raw[:end] == NEWLINE)[:1]
+    cols = int(row_end[0]) if len(row_end) else end
+    # A carriage return before the first newline means every line ends in CRLF
+    crlf = int(cols < end and cols > 0 and raw[cols - 1] == CR)
+    cols -= crlf
+    separator = 1 + crlf
+    stride = cols + separator
+    if (end + separator) % stride:
+        raise ValueError("grid rows should all have the same width")
+    if not (raw[cols + crlf:end:stride] == NEWLINE).all() or (crlf and not (raw[cols:end:stride] == CR).all()):
+        raise ValueError("grid rows should all have the same width and line ending")
+    return as_strided(raw, shape=((end + separator) // stride, cols), strides=(stride, 1), writeable=False)
+
+
+def grid_from_string(s: str) -> np.ndarray:
+    """View a text grid held in memory as a 2-D uint8 array"""
+    return grid_from_buffer(s.strip("\n").encode())
+
+
+def load_grid(path: Path) -> np.ndarray:
+    """Memory-map a text grid file and view it as a read-only 2-D uint8 array"""
+    with path.open("rb") as f:
+        # An empty file cannot be mapped
+        if not os.fstat(f.fileno()).st_size:
+            return grid_from_buffer(b"")
+        # The array keeps the map alive after the file is closed
+        return grid_from_buffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def symbol_mask(grid: np.ndarray, symbols: str) -> np.ndarray:
+    """Boolean array that is True wherever the grid holds one of the symbols"""
+    mask = grid == ord(symbols[0])
+    for symbol in symbols[1:]:
+        mask |= grid == ord(symbol)
+    return mask
+
+
+def map_symbols(grid: np.ndarray, mapping: dict[str, int], default: int = 0, dtype=np.uint8) -> np.ndarray:
+    """Translate every symbol in the grid through mapping with a 256 entry lookup table"""
+    table = np.full(256, default, dtype=dtype)
+    for symbol, value in mapping.items():
+        table[ord(symbol)] = value
+    return table[grid]
@@ -0,0 +1,104 @@
+"""AoC :: cold-start import times of each day, as reported by python -X importtime"""
+from dataclasses import asdict, dataclass, field
+import re
+import subprocess
+import sys
+import time
+from typing import Any, Iterable
+
+from aoc.bench import ROOT, discover
+
+# Constants
+# e.g. "import time:      1201 |       1831 |   aoc.grid"
+LINE_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+# Direct imports listed per day
+TOP: int = 5
+
+
+@dataclass
+class ImportEntry:
+    """One module as it was first imported, in microseconds"""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportReport:
+    """What importing one day's module cost in a fresh interpreter"""
+    day: int
+    name: str
+    total_us: int = 0
+    wall: float = 0.0
+    imports: list[ImportEntry] = field(default_factory=list)
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def parse_importtime(stderr: str) -> list[ImportEntry]:
+    """Read the -X importtime lines, which list every module after the ones it imported"""
+    entries = []
+    for line in stderr.splitlines():
+        if m := LINE_PATTERN.match(line):
+            self_us, cumulative_us, indent, module = m.groups()
+            entries.append(ImportEntry(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def import_day(day: int, name: str) -> ImportReport:
+    """Import a day's module in a fresh interpreter and break down where the time went"""
+    report = ImportReport(day, name)
+    wall = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {name}.__main__"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    report.wall = time.perf_counter() - wall
+    entries = parse_importtime(proc.stderr)
+    if proc.returncode:
+        lines = [line for line in proc.stderr.splitlines() if not LINE_PATTERN.match(line)]
+        report.error = lines[-1] if lines else f"exit status {proc.returncode}"
+        return report
+
+    # The day's own top level entries, and the direct imports listed before each of them
+    children: list[ImportEntry] = []
+    for entry in entries:
+        if entry.depth == 0:
+            if entry.module == name or entry.module.startswith(f"{name}."):
+                report.total_us += entry.cumulative_us
+                report.imports += children
+            children = []
+        elif entry.depth == 1:
+            children.append(entry)
+    report.imports.sort(key=lambda entry: entry.cumulative_us, reverse=True)
+    return report
+
+
+def import_times(days: Iterable[int] | None = None) -> list[ImportReport]:
+    """Import reports for the chosen days, or all of them, in day order"""
+    found = discover()
+    chosen = sorted(found) if days is None else sorted(days)
+    missing = set(chosen) - found.keys()
+    if missing:
+        raise ValueError(f"no package for days {sorted(missing)}")
+    return [import_day(day, found[day]) for day in chosen]
+
+
+def format_imports(reports: list[ImportReport], top: int = TOP) -> str:
+    """Lay out each day's import total and its heaviest direct imports as a text table"""
+    header = ("day", "import ms", "process ms", "heaviest direct imports (cumulative ms)")
+    rows = []
+    for report in reports:
+        if report.error:
+            rows.append((report.name, "", f"{1000 * report.wall:.1f}", report.error))
+            continue
+        heaviest = ", ".join(f"{e.module} {e.cumulative_us / 1000:.1f}" for e in report.imports[:top])
+        rows.append((report.name, f"{report.total_us / 1000:.1f}", f"{1000 * report.wall:.1f}", heaviest))
+    widths = [max(len(str(row[i])) for row in [header, *rows]) for i in range(len(header))]
+    lines = ["  ".join(str(v).ljust(w) for v, w in zip(header, widths))]
+    lines.append("  ".join("-" * w for w in widths))
+    lines += ["  ".join(str(v).ljust(w) for v, w in zip(row, widths)) for row in rows]
+    return "\n".join(lines)
@@ -0,0 +1,220 @@
+"""
+AoC :: optional counters, phase timers and memory peaks for the solvers' hot loops
+
+Off unless the AOC_INSTRUMENT environment variable is set to something other than 0 when
+this module is imported, or `enable` is called. A value of "memory" also traces
+allocations so every phase records its peak. While off, `ENABLED` is False and solvers
+test it before reporting anything, so the only cost is that check outside their loops.
+With AOC_INSTRUMENT_OUT set, whatever was recorded is written there when the process exits.
+"""
+import atexit
+from collections import Counter
+from dataclasses import dataclass, field
+import json
+import os
+from pathlib import Path
+import time
+import tracemalloc
+from typing import Any
+
+# Constants
+ENV = "AOC_INSTRUMENT"
+OUT_ENV = "AOC_INSTRUMENT_OUT"
+# Output files with these suffixes are written as collapsed stacks, anything else as JSON
+COLLAPSED_SUFFIXES = (".folded", ".collapsed")
+
+ENABLED: bool = os.environ.get(ENV, "") not in ("", "0")
+
+
+@dataclass
+class Distribution:
+    """Summary of the values observed under one name, bucketed by bit length"""
+    count: int = 0
+    total: int = 0
+    min: int | None = None
+    max: int | None = None
+    buckets: Counter[int] = field(default_factory=Counter)
+
+    def add(self, value: int):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.buckets[int(value).bit_length()] += 1
+
+
+@dataclass
+class PhaseTimer:
+    """Calls, total time and peak traced memory of one stack of nested phases"""
+    calls: int = 0
+    seconds: float = 0.0
+    peak_bytes: int = 0
+
+
+@dataclass
+class _Frame:
+    stack: tuple[str, ...]
+    start: float
+    start_bytes: int = 0
+    # Highest traced memory seen by this frame before a child phase reset the peak
+    carried: int = 0
+
+
+@dataclass
+class Recorder:
+    """Everything recorded since the last reset"""
+    counters: Counter[str] = field(default_factory=Counter)
+    distributions: dict[str, Distribution] = field(default_factory=dict)
+    phases: dict[tuple[str, ...], PhaseTimer] = field(default_factory=dict)
+    frames: list[_Frame] = field(default_factory=list)
+
+    def enter(self, name: str):
+        stack = (*self.frames[-1].stack, name) if self.frames else (name,)
+        frame = _Frame(stack, 0.0)
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if self.frames:
+                self.frames[-1].carried = max(self.frames[-1].carried, peak)
+            tracemalloc.reset_peak()
+            frame.start_bytes = frame.carried = current
+        self.frames.append(frame)
+        frame.start = time.perf_counter()
+
+    def exit(self):
+        elapsed = time.perf_counter()
+        frame = self.frames.pop()
+        timer = self.phases.setdefault(frame.stack, PhaseTimer())
+        timer.calls += 1
+        timer.seconds += elapsed - frame.start
+        if tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], frame.carried)
+            timer.peak_bytes = max(timer.peak_bytes, peak - frame.start_bytes)
+            if self.frames:
+                self.frames[-1].carried = max(self.frames[-1].carried, peak)
+
+    def snapshot(self) -> dict[str, Any]:
+        """The recorded data as plain JSON-ready values"""
+        children: Counter[tuple[str, ...]] = Counter()
+        for stack, timer in self.phases.items():
+            if len(stack) > 1:
+                children[stack[:-1]] += timer.seconds
+        return {
+            "counters": dict(self.counters),
+            "distributions": {
+                name: {**vars(dist), "buckets": {str(k): v for k, v in sorted(dist.buckets.items())}}
+                for name, dist in self.distributions.items()
+            },
+            "phases": [
+                {
+                    "stack": ";".join(stack),
+                    "calls": timer.calls,
+                    "seconds": timer.seconds,
+                    "self_seconds": max(timer.seconds - children[stack], 0.0),
+                    "peak_bytes": timer.peak_bytes,
+                }
+                for stack, timer in self.phases.items()
+            ],
+        }
+
+
+_recorder = Recorder()
+
+
+class _Phase:
+    """Times the block it wraps as a phase nested in any that are already open"""
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        _recorder.enter(self.name)
+
+    def __exit__(self, *exc):
+        _recorder.exit()
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+def enable(memory: bool = False):
+    """Switch recording on, and with `memory` start tracing allocations too"""
+    global ENABLED
+    ENABLED = True
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    """Switch recording off, keeping what has been recorded"""
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    """Forget everything recorded so far"""
+    global _recorder
+    _recorder = Recorder()
+
+
+def count(name: str, n: int = 1):
+    """Add n to a counter"""
+    if ENABLED:
+        _recorder.counters[name] += n
+
+
+def observe(name: str, value: int):
+    """Record one value, e.g. a frontier size, in a distribution"""
+    if ENABLED:
+        _recorder.distributions.setdefault(name, Distribution()).add(value)
+
+
+def phase(name: str) -> _Phase | _NoPhase:
+    """A context manager timing its block, which does nothing while recording is off"""
+    return _Phase(name) if ENABLED else _NO_PHASE
+
+
+def snapshot() -> dict[str, Any]:
+    """Everything recorded since the last reset, as plain JSON-ready values"""
+    return _recorder.snapshot()
+
+
+def collapsed(snapshot: dict[str, Any], prefix: str = "") -> str:
+    """
+    Phase self times as collapsed stacks, one "a;b;c microseconds" line each
+
+    This is the input format of flamegraph.pl and speedscope. A prefix is joined on to
+    the front of every stack, e.g. the day the snapshot was taken from.
+    """
+    lines = []
+    for entry in snapshot["phases"]:
+        micros = round(1e6 * entry["self_seconds"])
+        if micros:
+            stack = f"{prefix};{entry['stack']}" if prefix else entry["stack"]
+            lines.append(f"{stack} {micros}")
+    return "\n".join(lines)
+
+
+def write(path: Path, snapshots: dict[str, dict[str, Any]]):
+    """Write snapshots by name, as collapsed stacks prefixed with each name or else as JSON"""
+    if path.suffix in COLLAPSED_SUFFIXES:
+        stacks = [collapsed(snap, name) for name, snap in snapshots.items()]
+        path.write_text("\n".join(s for s in stacks if s) + "\n")
+    else:
+        path.write_text(json.dumps(snapshots, indent=2))
+
+
+if ENABLED:
+    enable(memory="memory" in os.environ[ENV].split(","))
+    if out := os.environ.get(OUT_ENV):
+        atexit.register(lambda: write(Path(out), {"main": snapshot()}))